@@ -1,11 +1,22 @@
-import requests
-from bs4 import BeautifulSoup
+import argparse
+import glob
 import json
+import os
 import random
+import threading
 import time
-from faker import Faker
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 
-fake = Faker()
+try:
+    import lxml  # noqa: F401  (only checked for: BeautifulSoup's fast "lxml" backend)
+    DEFAULT_PARSER = "lxml"
+except ImportError:
+    DEFAULT_PARSER = "html.parser"
 
 BASE_URL = "https://aztechshop.az/noutbuklar/?limit=96"
 OUTPUT_FILE = "aztech_products.json"
@@ -14,15 +25,63 @@ HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
 }
 
-def get_soup(url):
+WORKERS = 8
+# Requests per second sent to any one host.
+RATE_PER_HOST = 0.5
+
+
+class HostRateLimiter:
+    """Spaces out requests to the same host; different hosts never wait for each other."""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate > 0 else 0
+        self._next = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next.get(host, now))
+            self._next[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def make_session(workers):
+    """One session shared by all workers, with a connection pool large enough for them."""
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+session = make_session(WORKERS)
+rate_limiter = HostRateLimiter(RATE_PER_HOST)
+
+
+def fetch_html(url):
+    """Page body as bytes, or None on error. Paths of saved pages are read from disk."""
+    if not url.startswith(("http://", "https://")):
+        with open(url, "rb") as f:
+            return f.read()
+    rate_limiter.wait(url)
     try:
-        response = requests.get(url, headers=HEADERS, timeout=10)
+        response = session.get(url, timeout=10)
         response.raise_for_status()
-        return BeautifulSoup(response.content, 'html.parser')
+        return response.content
     except Exception as e:
         print(f"Error fetching {url}: {e}")
         return None
 
+def get_soup(url, parser=DEFAULT_PARSER):
+    html = fetch_html(url)
+    if html is None:
+        return None
+    return BeautifulSoup(html, parser)
+
 def get_high_res_image_url(img_url):
     """Convert image URL to high resolution by replacing dimensions"""
     if '533x398' in img_url:
@@ -31,12 +90,15 @@ def get_high_res_image_url(img_url):
         return img_url.replace('80x80', '1300x1300')
     return img_url
 
-def scrape_listing_page(url):
-    """Scrape all products from the listing page"""
-    soup = get_soup(url)
+def scrape_listing_page(url, parser=DEFAULT_PARSER):
+    """Scrape all products from the listing page (a URL, or the path of a saved page)"""
+    soup = get_soup(url, parser)
     if not soup:
         return []
-    
+    return parse_listing(soup)
+
+def parse_listing(soup):
+    """Products found in a parsed listing page"""
     products = []
     product_thumbs = soup.select('.product-thumb')
     
@@ -51,6 +113,9 @@ def scrape_listing_page(url):
                 
             title = title_link.get_text(strip=True)
             product_url = title_link.get('href', '')
+            # Values the listing page doesn't have are made up, but the same
+            # ones on every run, so a re-scrape only differs where the site does.
+            rng = random.Random(product_url)
             
             # Price
             price = 0
@@ -60,11 +125,11 @@ def scrape_listing_page(url):
                 try:
                     # Remove currency symbols and convert to float
                     price_clean = price_text.replace('₼', '').replace(',', '').strip()
-                    price = float(price_clean) if price_clean and price_clean != '0' else random.randint(500, 3000)
+                    price = float(price_clean) if price_clean and price_clean != '0' else rng.randint(500, 3000)
                 except ValueError:
-                    price = float(random.randint(500, 3000))
+                    price = float(rng.randint(500, 3000))
             else:
-                price = float(random.randint(500, 3000))
+                price = float(rng.randint(500, 3000))
             
             # Images - get from data-img attributes
             images = []
@@ -94,7 +159,7 @@ def scrape_listing_page(url):
                     images.append(high_res_url)
             
             if not images:
-                images = [f"https://loremflickr.com/640/480/laptop?lock={random.randint(1, 100)}"]
+                images = [f"https://loremflickr.com/640/480/laptop?lock={rng.randint(1, 100)}"]
             
             # Brand - extract from title or use fallback
             brand = "Unknown"
@@ -122,16 +187,15 @@ def scrape_listing_page(url):
             
             # Check for special price/discount
             has_special = thumb.select_one('.price-old')
-            discount = random.uniform(5, 15) if has_special else 0
+            discount = rng.uniform(5, 15) if has_special else 0
             
             product = {
-                "id": random.randint(1000, 9999),
                 "title": title,
                 "description": description,
                 "price": price,
                 "discountPercentage": round(discount, 2),
-                "rating": round(random.uniform(3.5, 5.0), 2),
-                "stock": random.randint(0, 50),
+                "rating": round(rng.uniform(3.5, 5.0), 2),
+                "stock": rng.randint(0, 50),
                 "brand": brand,
                 "category": "laptops",
                 "thumbnail": images[0],
@@ -148,44 +212,87 @@ def scrape_listing_page(url):
     
     return products
 
+def page_urls(pages):
+    return [BASE_URL] + [f"{BASE_URL}&page={n}" for n in range(2, pages + 1)]
+
+def fixture_paths(directory):
+    return sorted(glob.glob(os.path.join(directory, "*.html")))
+
+def save_fixture(directory, number, url):
+    """Fetch `url` into the directory; the saved page's path, or None if it couldn't be fetched."""
+    html = fetch_html(url)
+    if html is None:
+        return None
+    path = os.path.join(directory, f"page-{number:04d}.html")
+    with open(path, "wb") as f:
+        f.write(html)
+    return path
+
+def scrape_pages(sources, workers=WORKERS, parser=DEFAULT_PARSER):
+    """Scrape listing pages concurrently; products come back in page order."""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda source: scrape_listing_page(source, parser), sources))
+    return [product for products in results for product in products]
+
 def main():
-    print("Starting AztechShop scraper...")
-    
-    all_products = []
-    
-    # Scrape from multiple pages
-    pages_to_scrape = [
-        "https://aztechshop.az/noutbuklar/?limit=96",
-        "https://aztechshop.az/noutbuklar/?limit=96&page=2"
-    ]
-    
-    for page_num, page_url in enumerate(pages_to_scrape, 1):
-        print(f"\nFetching from Page {page_num}: {page_url}")
-        products = scrape_listing_page(page_url)
-        
-        if products:
-            all_products.extend(products)
-            print(f"Added {len(products)} products from page {page_num}")
-        else:
-            print(f"No products found on page {page_num}")
-        
-        # Be polite - wait between pages
-        if page_num < len(pages_to_scrape):
-            time.sleep(2)
-    
+    parser = argparse.ArgumentParser(description="Scrape laptop listings from aztechshop.az")
+    parser.add_argument("--pages", type=int, default=2, help="number of listing pages to fetch")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="concurrent fetch/parse workers")
+    parser.add_argument("--rate", type=float, default=RATE_PER_HOST,
+                        help="max requests per second to one host (0 = unlimited)")
+    parser.add_argument("--parser", default=DEFAULT_PARSER,
+                        help="BeautifulSoup backend: lxml (fast, needs `pip install lxml`) or html.parser")
+    parser.add_argument("--fixtures", help="parse the saved *.html pages in this directory instead of fetching")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="with --fixtures: parse every page this many times (for benchmarking)")
+    parser.add_argument("--save-fixtures", help="also save every fetched page into this directory")
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    parser.add_argument("--sync", action="store_true",
+                        help="also merge the results into the shop's products (see `manage.py sync-catalog`)")
+    args = parser.parse_args()
+
+    global session, rate_limiter
+    session = make_session(args.workers)
+    rate_limiter = HostRateLimiter(args.rate)
+
+    if args.fixtures:
+        sources = fixture_paths(args.fixtures) * args.repeat
+        print(f"Parsing {len(sources)} saved pages from {args.fixtures} with {args.parser}...")
+    else:
+        sources = page_urls(args.pages)
+        print(f"Starting AztechShop scraper: {len(sources)} pages, {args.workers} workers...")
+        if args.save_fixtures:
+            os.makedirs(args.save_fixtures, exist_ok=True)
+            with ThreadPoolExecutor(max_workers=args.workers) as pool:
+                saved = list(pool.map(lambda n_url: save_fixture(args.save_fixtures, *n_url),
+                                      enumerate(sources, 1)))
+            # Only this run's pages: the directory may hold pages saved before.
+            sources = [path for path in saved if path is not None]
+
+    started = time.perf_counter()
+    all_products = scrape_pages(sources, args.workers, args.parser)
+    elapsed = time.perf_counter() - started
+
     if not all_products:
         print("No products found!")
         return
     
     # Save Data
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+    with open(args.output, 'w', encoding='utf-8') as f:
         json.dump(all_products, f, indent=2, ensure_ascii=False)
         
     print(f"\n{'='*50}")
     print(f"Scraping complete!")
     print(f"Total products saved: {len(all_products)}")
-    print(f"Output file: {OUTPUT_FILE}")
+    print(f"Pages: {len(sources)} in {elapsed:.2f}s "
+          f"({len(sources) / elapsed:.1f} pages/s, {len(all_products) / elapsed:.1f} products/s)")
+    print(f"Output file: {args.output}")
     print(f"{'='*50}")
 
+    if args.sync:
+        from backend.catalog_sync import sync_products
+        counts = sync_products(all_products)
+        print("Catalog sync: " + ", ".join(f"{name}: {count}" for name, count in counts.items()))
+
 if __name__ == "__main__":
     main()
@@ -5,14 +5,22 @@ from .routes.users import users_bp
 from .routes.products import products_bp
 from .routes.cart import cart_bp
 from .routes.orders import orders_bp
+from .routes.analytics import analytics_bp
+from .responses import FastJSONProvider, compress_response
+from . import metrics
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 CORS(app)
+# Registered first so its after_request hook runs last and times the rest.
+metrics.init_app(app)
+app.after_request(compress_response)
 
 app.register_blueprint(users_bp)
 app.register_blueprint(products_bp)
 app.register_blueprint(cart_bp)
 app.register_blueprint(orders_bp)
+app.register_blueprint(analytics_bp)
 
 @app.route("/")
 def home():
@@ -22,10 +30,21 @@ def home():
         "endpoints": {
             "auth": ["/register", "/login"],
             "users": ["/user/<username>"],
-            "products": ["/products", "/products/<id>", "/products?q=search"],
-            "cart": ["/cart/<username>", "/cart/<username>/add", "/cart/<username>/remove"],
+            "products": [
+                "/products", "/products/<id>", "/products?q=search",
+                "/products/<id>/reviews?sort=newest&limit=10&cursor=",
+                "/products/top?by=sold|rating&brand=Asus&k=10",
+                "/products?limit=24&offset=0&sort=-price&fields=id,title,price,thumbnail,rating",
+                "/products?brand=Asus&min_price=500&max_price=2000&min_rating=4&in_stock=1"
+            ],
+            "cart": ["/cart/<username>", "/cart/<username>/add", "/cart/<username>/remove", "/cart/<username>/batch"],
             "orders": ["/checkout", "/orders/<username>"],
-            "admin": ["/admin/products", "/admin/products/<id>"]
+            "admin": [
+                "/admin/products", "/admin/products/<id>",
+                "/admin/products/bulk", "/admin/products/export",
+                "/admin/analytics/sales?group_by=day|brand|product&from=2025-01-01&to=2025-12-31"
+            ],
+            "metrics": ["/metrics"]
         }
     }), 200
 
@@ -0,0 +1,270 @@
+from bisect import bisect_left, bisect_right, insort
+
+try:
+    import numpy as np
+except ImportError:  # the rollup rebuild falls back to plain Python
+    np = None
+
+from .locks import sales_locks
+from .store import DerivedIndex
+from .utils import sales_store
+
+GROUPS = ["day", "brand", "product"]
+UNKNOWN_BRAND = "Unknown"
+
+
+def rollup_key(day, dimension, value):
+    return f"{day}|{dimension}|{value}"
+
+
+def line_revenue(item):
+    if "subtotal" in item:
+        return item["subtotal"]
+    return round(item.get("price", 0) * item.get("quantity", 0), 2)
+
+
+def order_rollups(order, brands):
+    """{key: rollup increment} for one order; `brands` maps product id -> brand."""
+    day = (order.get("date") or "")[:10]
+    increments = {}
+
+    def add(dimension, value, label, units, revenue):
+        key = rollup_key(day, dimension, value)
+        row = increments.get(key)
+        if row is None:
+            # Every order counts once per rollup row it touches.
+            row = increments[key] = {
+                "key": key, "day": day, "dimension": dimension, "value": value, "label": label,
+                "units": 0, "revenue": 0, "orders": 1,
+            }
+        row["units"] += units
+        row["revenue"] += revenue
+
+    for item in order.get("items", []):
+        units, revenue = item.get("quantity", 0), line_revenue(item)
+        product_id = item.get("product_id")
+        add("day", day, day, units, revenue)
+        add("brand", brands.get(product_id) or UNKNOWN_BRAND, None, units, revenue)
+        add("product", str(product_id), item.get("title"), units, revenue)
+    return increments
+
+
+def record_order(order, products):
+    """Fold a just placed order into the sales rollups.
+
+    `products` are the ordered products (for their brands). Returns the
+    rows as they were before, for `restore_rollups` if the order is undone.
+    """
+    increments = order_rollups(order, {p["id"]: p.get("brand") for p in products})
+    with sales_locks.hold(increments):
+        current = sales_store.get_many(increments)
+        previous = [dict(row) for row in current.values()]
+        rows = []
+        for key, increment in increments.items():
+            row = dict(current.get(key) or dict(increment, units=0, revenue=0, orders=0))
+            row["units"] += increment["units"]
+            row["revenue"] = round(row["revenue"] + increment["revenue"], 2)
+            row["orders"] += increment["orders"]
+            rows.append(row)
+        sales_store.put_many(rows)
+    return previous, [key for key in increments if key not in current]
+
+
+def restore_rollups(previous, created):
+    with sales_locks.hold([row["key"] for row in previous] + created):
+        if previous:
+            sales_store.put_many(previous)
+        if created:
+            sales_store.delete_many(created)
+
+
+class _Series:
+    """One brand's or product's rollups by day, with running totals.
+
+    Totals over any day range are the difference of two running totals.
+    Checkouts only add to the latest day, so keeping the totals current
+    costs O(1) per sale; a change to an older day redoes the days after it.
+    """
+
+    __slots__ = ("label", "days", "values", "running")
+
+    def __init__(self, label):
+        self.label = label
+        self.days = []
+        self.values = []   # (units, revenue, orders) per day
+        self.running = []  # (units, revenue, orders) up to and including that day
+
+    def insert(self, day, values):
+        i = bisect_left(self.days, day)
+        self.days.insert(i, day)
+        self.values.insert(i, values)
+        self.running.insert(i, None)
+        self._recount(i)
+
+    def remove(self, day):
+        i = bisect_left(self.days, day)
+        del self.days[i], self.values[i], self.running[i]
+        self._recount(i)
+
+    def _recount(self, start):
+        units, revenue, orders = self.running[start - 1] if start else (0, 0, 0)
+        for i in range(start, len(self.days)):
+            u, r, o = self.values[i]
+            units, revenue, orders = units + u, revenue + r, orders + o
+            self.running[i] = (units, revenue, orders)
+
+    def between(self, start, end):
+        lo = 0 if start is None else bisect_left(self.days, start)
+        hi = len(self.days) if end is None else bisect_right(self.days, end)
+        if hi <= lo:
+            return None
+        units, revenue, orders = self.running[hi - 1]
+        if lo:
+            before = self.running[lo - 1]
+            units, revenue, orders = units - before[0], revenue - before[1], orders - before[2]
+        return {"label": self.label, "units": units, "revenue": revenue, "orders": orders}
+
+
+class SalesIndex(DerivedIndex):
+    """The sales rollups arranged for date-range reports.
+
+    Day rows are kept sorted, so a day report is two bisects and a slice.
+    Brand and product rows are kept as per-value running totals, so their
+    reports cost two bisects per brand or product, however many days the
+    range covers, and never touch orders.
+    """
+
+    def __init__(self, dataset):
+        self.reset()
+        super().__init__(dataset)
+
+    def reset(self):
+        self._rows = {}
+        self._days = []  # sorted (day, key) of the "day" rollups
+        self._series = {dimension: {} for dimension in GROUPS if dimension != "day"}
+
+    def add(self, row):
+        self._rows[row["key"]] = row
+        if row["dimension"] == "day":
+            insort(self._days, (row["day"], row["key"]))
+            return
+        series = self._series[row["dimension"]].get(row["value"])
+        if series is None:
+            series = self._series[row["dimension"]][row["value"]] = _Series(row.get("label"))
+        series.insert(row["day"], (row["units"], row["revenue"], row["orders"]))
+
+    def discard(self, key):
+        row = self._rows.pop(key, None)
+        if row is None:
+            return
+        if row["dimension"] == "day":
+            del self._days[bisect_left(self._days, (row["day"], key))]
+            return
+        series = self._series[row["dimension"]][row["value"]]
+        series.remove(row["day"])
+        if not series.days:
+            del self._series[row["dimension"]][row["value"]]
+
+    def report(self, group_by, start=None, end=None):
+        """{value: {label, units, revenue, orders}} between two ISO days (inclusive)."""
+        with self.synced():
+            if group_by == "day":
+                lo = 0 if start is None else bisect_left(self._days, (start,))
+                hi = len(self._days) if end is None else bisect_right(self._days, (end, "\uffff"))
+                totals = {}
+                for day, key in self._days[lo:hi]:
+                    row = self._rows[key]
+                    totals[day] = {"label": day, "units": row["units"], "revenue": row["revenue"],
+                                   "orders": row["orders"]}
+                return totals
+            totals = {}
+            for value, series in self._series[group_by].items():
+                total = series.between(start, end)
+                if total is not None:
+                    totals[value] = total
+            return totals
+
+
+def rebuild_rows(orders, brands, vectorized=None):
+    """All rollup rows computed from scratch over `orders`.
+
+    Orders are flattened into columns once; with NumPy the grouping is
+    done by np.unique/np.bincount over integer codes, otherwise in a plain
+    Python pass. `vectorized=False` forces the Python path.
+    """
+    if vectorized is None:
+        vectorized = np is not None
+    if not vectorized:
+        rows = {}
+        for order in orders:
+            for key, increment in order_rollups(order, brands).items():
+                row = rows.get(key)
+                if row is None:
+                    rows[key] = increment
+                else:
+                    row["units"] += increment["units"]
+                    row["revenue"] += increment["revenue"]
+                    row["orders"] += 1
+        for row in rows.values():
+            row["revenue"] = round(row["revenue"], 2)
+        return list(rows.values())
+
+    # Flatten order lines into columns; days and products become integer codes.
+    day_lookup, product_lookup, titles = {}, {}, []
+    order_index, day_codes, product_codes, units, prices, subtotals = [], [], [], [], [], []
+    nan = float("nan")
+    for position, order in enumerate(orders):
+        day = day_lookup.setdefault((order.get("date") or "")[:10], len(day_lookup))
+        for item in order.get("items", []):
+            product_id = item.get("product_id")
+            code = product_lookup.get(product_id)
+            if code is None:
+                code = product_lookup[product_id] = len(product_lookup)
+                titles.append(item.get("title"))
+            order_index.append(position)
+            day_codes.append(day)
+            product_codes.append(code)
+            units.append(item.get("quantity", 0))
+            prices.append(item.get("price", 0))
+            subtotals.append(item.get("subtotal", nan))
+    if not order_index:
+        return []
+    order_index = np.asarray(order_index, dtype=np.int64)
+    day_codes = np.asarray(day_codes, dtype=np.int64)
+    product_codes = np.asarray(product_codes, dtype=np.int64)
+    units = np.asarray(units, dtype=np.int64)
+    subtotals = np.asarray(subtotals, dtype=np.float64)
+    revenue = np.where(np.isnan(subtotals), np.round(np.asarray(prices, dtype=np.float64) * units, 2), subtotals)
+    day_values = list(day_lookup)
+    product_values = list(product_lookup)
+    brand_values = sorted({brands.get(p) or UNKNOWN_BRAND for p in product_values})
+    brand_lookup = {brand: i for i, brand in enumerate(brand_values)}
+    brand_of_product = np.asarray([brand_lookup[brands.get(p) or UNKNOWN_BRAND] for p in product_values])
+
+    def grouped(dimension, codes, names, labels):
+        # One code per (day, member) pair; orders are counted once per pair.
+        count = max(len(names), 1)
+        pairs, inverse = np.unique(day_codes * count + codes, return_inverse=True)
+        unit_sums = np.bincount(inverse, weights=units).astype(np.int64).tolist()
+        revenue_sums = np.round(np.bincount(inverse, weights=revenue), 2).tolist()
+        order_pairs = np.unique(order_index * len(pairs) + inverse)
+        order_counts = np.bincount(order_pairs % len(pairs), minlength=len(pairs)).tolist()
+        rows = []
+        for i, (day, member) in enumerate(zip((pairs // count).tolist(), (pairs % count).tolist())):
+            day = day_values[day]
+            value = names[member] if names else day
+            rows.append({
+                "key": f"{day}|{dimension}|{value}", "day": day, "dimension": dimension,
+                "value": value, "label": labels[member] if labels else day,
+                "units": unit_sums[i], "revenue": revenue_sums[i], "orders": order_counts[i],
+            })
+        return rows
+
+    return (
+        grouped("day", np.zeros(len(day_codes), dtype=np.int64), [], [])
+        + grouped("brand", brand_of_product[product_codes], brand_values, [None] * len(brand_values))
+        + grouped("product", product_codes, [str(p) for p in product_values], titles)
+    )
+
+
+sales_index = SalesIndex(sales_store)
@@ -0,0 +1,162 @@
+import json
+
+from .catalog import REQUIRED_FIELDS, build_product
+from .locks import product_locks
+from .records import json_default
+from .utils import delete_product_reviews, product_ids, products_store, storage_transaction
+
+BULK_OPS = ["upsert", "delete"]
+# Products written per storage write (one file rewrite, journal append or
+# transaction), and the most per-line errors returned in one response.
+BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 100
+
+NUMBER_FIELDS = ["price", "discountPercentage", "rating", "weight", "stars"]
+INTEGER_FIELDS = ["stock", "sold"]
+TEXT_FIELDS = ["title", "description", "brand", "category", "thumbnail"]
+
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def validate_fields(fields):
+    """Error message for malformed product fields, or None."""
+    for field in NUMBER_FIELDS:
+        if field in fields and (not is_number(fields[field]) or fields[field] < 0):
+            return f"{field} must be a non-negative number"
+    for field in INTEGER_FIELDS:
+        if field in fields and (not isinstance(fields[field], int) or isinstance(fields[field], bool)
+                                or fields[field] < 0):
+            return f"{field} must be a non-negative integer"
+    for field in TEXT_FIELDS:
+        if field in fields and not isinstance(fields[field], str):
+            return f"{field} must be a string"
+    if "images" in fields and not isinstance(fields["images"], list):
+        return "images must be a list"
+    return None
+
+
+def parse_line(text):
+    """(op, product_id, fields) from one NDJSON line; raises ValueError."""
+    try:
+        record = json.loads(text)
+    except ValueError:
+        raise ValueError("invalid JSON")
+    if not isinstance(record, dict):
+        raise ValueError("must be an object")
+    op = record.pop("op", "upsert")
+    if op not in BULK_OPS:
+        raise ValueError(f"op must be one of {', '.join(BULK_OPS)}")
+    product_id = record.get("id")
+    if product_id is not None and (not isinstance(product_id, int) or isinstance(product_id, bool)
+                                   or product_id < 1):
+        raise ValueError("id must be a positive integer")
+    if op == "delete":
+        if product_id is None:
+            raise ValueError("id is required")
+        return op, product_id, None
+    error = validate_fields(record)
+    if error:
+        raise ValueError(error)
+    if product_id is None:
+        # Always a new product, so it must be complete.
+        missing = [f for f in REQUIRED_FIELDS if not record.get(f)]
+        if missing:
+            raise ValueError(f"{missing[0]} is required")
+    return op, product_id, record
+
+
+class BulkImport:
+    """Applies a stream of NDJSON product upserts/deletes in batches.
+
+    Every line is an object. `{"op": "delete", "id": 7}` deletes; any other
+    line (with `"op": "upsert"` or no op) merges its fields into the product
+    with that `id`, or creates one when there is no such product or no id,
+    so the output of the export endpoint can be imported as it is.
+
+    Lines are parsed and validated one at a time and only `BATCH_SIZE`
+    products are held before they are written, so memory stays flat
+    whatever the size of the input. A bad line is reported and skipped;
+    the lines around it still apply.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.batch_size = batch_size
+        self.counts = {"lines": 0, "created": 0, "updated": 0, "deleted": 0, "failed": 0, "batches": 0}
+        self.errors = []
+        self._pending = {}  # product id -> [(line number, op, fields)]
+
+    def error(self, number, message):
+        self.counts["failed"] += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": number, "error": message})
+
+    def feed(self, lines):
+        for number, text in enumerate(lines, 1):
+            if isinstance(text, bytes):
+                text = text.decode("utf-8", "replace")
+            if not text.strip():
+                continue
+            self.counts["lines"] += 1
+            try:
+                op, product_id, fields = parse_line(text)
+            except ValueError as e:
+                self.error(number, str(e))
+                continue
+            if product_id is None:
+                product_id = product_ids.allocate()
+            self._pending.setdefault(product_id, []).append((number, op, fields))
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+        self.flush()
+        return self
+
+    def flush(self):
+        """Write the pending batch: one put_many and one delete_many."""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        with product_locks.hold(pending), storage_transaction():
+            current = products_store.get_many(pending)
+            puts, deletes = [], []
+            for product_id, ops in pending.items():
+                product = current.get(product_id)
+                if product is not None:
+                    product = dict(product)
+                for number, op, fields in ops:
+                    if op == "delete":
+                        if product is None:
+                            self.error(number, "Product not found")
+                            continue
+                        product = None
+                        self.counts["deleted"] += 1
+                    elif product is None:
+                        missing = [f for f in REQUIRED_FIELDS if not fields.get(f)]
+                        if missing:
+                            self.error(number, f"{missing[0]} is required")
+                            continue
+                        product = {**build_product(fields, product_id), **fields}
+                        self.counts["created"] += 1
+                    else:
+                        product.update(fields)
+                        self.counts["updated"] += 1
+                if product is not None:
+                    puts.append(product)
+                elif product_id in current:
+                    deletes.append(product_id)
+            if puts:
+                products_store.put_many(puts)
+            if deletes:
+                products_store.delete_many(deletes)
+                delete_product_reviews(deletes)
+        self.counts["batches"] += 1
+
+    def report(self):
+        return {**self.counts, "errors": self.errors}
+
+
+def export_lines(batch_size=BATCH_SIZE):
+    """The catalog as NDJSON, one chunk per storage batch."""
+    for rows in products_store.scan(batch_size):
+        yield "".join(json.dumps(row, separators=(",", ":"), default=json_default) + "\n" for row in rows)
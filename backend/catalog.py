@@ -0,0 +1,130 @@
+from .facets import FacetIndex
+from .http_cache import Revisions
+from .rankings import RankingIndex
+from .responses import ResponseCache
+from . import config
+from .search import SearchIndex
+from .utils import products_store
+
+SORT_FIELDS = ["id", "title", "price", "rating", "sold", "stock", "discountPercentage"]
+DEFAULT_LIMIT = 24
+MAX_LIMIT = 100
+# Fields an admin must give for a new product.
+REQUIRED_FIELDS = ["title", "description", "price", "brand"]
+
+
+def parse_int(value, name, minimum=0, maximum=None):
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer")
+    if number < minimum:
+        raise ValueError(f"{name} must be at least {minimum}")
+    if maximum is not None and number > maximum:
+        raise ValueError(f"{name} must be at most {maximum}")
+    return number
+
+
+def parse_float(value, name):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a number")
+
+
+def parse_list(args, name):
+    """Values of a repeatable, comma-separated query parameter (brand=Asus,MSI&brand=HP)."""
+    return [v.strip() for raw in args.getlist(name) for v in raw.split(",") if v.strip()]
+
+
+def parse_filters(args):
+    """Keyword arguments for FacetIndex.filter from the request's query string."""
+    filters = {}
+    if parse_list(args, "brand"):
+        filters["brands"] = parse_list(args, "brand")
+    if parse_list(args, "availability"):
+        filters["availability"] = parse_list(args, "availability")
+    for name in ("min_price", "max_price", "min_rating"):
+        if args.get(name, "") != "":
+            filters[name] = parse_float(args[name], name)
+    if args.get("in_stock", "").lower() in ("1", "true", "yes"):
+        filters["in_stock"] = True
+    return filters
+
+
+def parse_sort(sort):
+    """(field, descending, value for products without the field) for `field` or `-field`."""
+    descending = sort.startswith("-")
+    field = sort.lstrip("-")
+    if field not in SORT_FIELDS:
+        raise ValueError(f"sort must be one of {', '.join(SORT_FIELDS)} (prefix with - for descending)")
+    return field, descending, "" if field == "title" else 0
+
+
+def sort_products(products, order):
+    """Sort by a parsed sort= argument, keeping ties in catalog order."""
+    field, descending, missing = order
+    return sorted(products, key=lambda p: p.get(field, missing), reverse=descending)
+
+
+def parse_fields(value):
+    fields = [f.strip() for f in value.split(",") if f.strip()]
+    if not fields:
+        raise ValueError("fields must list at least one field")
+    return fields
+
+
+def project(product, fields):
+    """Slim copy of `product` holding only `fields` (missing fields are skipped)."""
+    return {f: product[f] for f in fields if f in product}
+
+
+def present(product, fields=None):
+    """`product` as listings show it: `sold` defaults to 0, and only `fields` if given.
+
+    The default goes on a copy; the stored row is never touched.
+    """
+    if "sold" not in product:
+        product = dict(product, sold=0)
+    return project(product, fields) if fields else product
+
+
+def paginate(items, limit, offset):
+    return page_of(items[offset:offset + limit], len(items), limit, offset)
+
+
+def page_of(items, total, limit, offset):
+    """Page response for `items`, already cut from a listing of `total`."""
+    return {"total": total, "offset": offset, "limit": limit, "items": items}
+
+
+def build_product(data, product_id):
+    """A new catalog product from admin input, with the usual defaults."""
+    return {
+        "id": product_id,
+        "title": data["title"],
+        "description": data["description"],
+        "price": data["price"],
+        "brand": data["brand"],
+        "discountPercentage": data.get("discountPercentage", 0),
+        "rating": data.get("rating", 5),
+        "stock": data.get("stock", 50),
+        "weight": data.get("weight", 2),
+        "dimensions": data.get("dimensions", {"width": 0, "height": 0, "depth": 0}),
+        "warrantyInformation": data.get("warrantyInformation", "1 year warranty"),
+        "shippingInformation": data.get("shippingInformation", "Ships in 1 week"),
+        "availabilityStatus": data.get("availabilityStatus", "In Stock"),
+        "review_count": 0,
+        "rating_sum": 0,
+        "images": data.get("images", []),
+        "thumbnail": data.get("thumbnail", ""),
+        "stars": data.get("stars", 5),
+        "sold": 0
+    }
+
+
+search_index = SearchIndex(products_store)
+facet_index = FacetIndex(products_store)
+ranking_index = RankingIndex(products_store)
+product_revisions = Revisions(products_store)
+listing_cache = ResponseCache(config.RESPONSE_CACHE_SIZE)
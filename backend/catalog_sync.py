@@ -0,0 +1,131 @@
+import hashlib
+import json
+
+from .locks import product_locks
+from .utils import delete_product_reviews, product_ids, products_store, storage_transaction
+
+# The fields a re-scrape may change on a product that is already listed;
+# everything else (title, description, reviews, sales...) is left to the shop.
+SYNCED_FIELDS = ["price", "stock", "discountPercentage", "images"]
+REMOVE_POLICIES = ["keep", "deactivate", "delete"]
+
+
+def content_hash(item):
+    """Hash of the synced fields of a scraped item, stored on the product as `source_hash`."""
+    values = [item.get(field) for field in SYNCED_FIELDS]
+    return hashlib.sha1(json.dumps(values, sort_keys=True).encode()).hexdigest()
+
+
+def availability(stock):
+    return "In Stock" if stock else "Out of Stock"
+
+
+def new_product(item, product_id, digest):
+    images = item.get("images") or []
+    return {
+        "id": product_id,
+        "title": item.get("title", ""),
+        "description": item.get("description", ""),
+        "price": item.get("price", 0),
+        "brand": item.get("brand", "Unknown"),
+        "category": item.get("category", ""),
+        "discountPercentage": item.get("discountPercentage", 0),
+        "rating": item.get("rating", 5),
+        "stock": item.get("stock", 0),
+        "weight": 2,
+        "dimensions": {"width": 0, "height": 0, "depth": 0},
+        "warrantyInformation": "1 year warranty",
+        "shippingInformation": "Ships in 1 week",
+        "availabilityStatus": availability(item.get("stock", 0)),
+        "review_count": 0,
+        "rating_sum": 0,
+        "images": images,
+        "thumbnail": item.get("thumbnail") or (images[0] if images else ""),
+        "stars": 5,
+        "sold": 0,
+        "specs": item.get("specs", {}),
+        "url": item["url"],
+        "source_hash": digest,
+    }
+
+
+def apply_item(product, item, digest):
+    """Copy of `product` with the synced fields taken from `item`."""
+    updated = dict(product)
+    for field in SYNCED_FIELDS:
+        if field in item and item[field] != product.get(field):
+            updated[field] = item[field]
+    if updated.get("images") != product.get("images") and updated.get("images"):
+        updated["thumbnail"] = updated["images"][0]
+    updated["availabilityStatus"] = availability(updated.get("stock", 0))
+    updated["source_hash"] = digest
+    return updated
+
+
+def sync_products(items, remove="deactivate", dry_run=False):
+    """Merge scraped `items` into the product store, writing only what changed.
+
+    Products are matched on their source `url` and keep their ids. An item
+    whose content hash equals the stored `source_hash` is skipped without a
+    write, so re-running an unchanged scrape touches nothing and listing,
+    search and ETag caches only move for the products that did change.
+
+    Listed products missing from `items` are handled by `remove`: "keep"
+    leaves them alone, "deactivate" sets their stock to 0 (they come back on
+    the next scrape that lists them), "delete" removes them.
+
+    Returns the counts of added, updated, unchanged and removed products.
+    """
+    counts = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0}
+    incoming = {}
+    for item in items:
+        if item.get("url"):
+            incoming[item["url"]] = item
+
+    listed = {p["url"]: p["id"] for p in products_store.load() if p.get("url")}
+    touched = [listed[url] for url in incoming if url in listed]
+    if remove != "keep":
+        touched += [product_id for url, product_id in listed.items() if url not in incoming]
+
+    with product_locks.hold(touched):
+        current = products_store.get_many(touched)
+        writes, deletes = [], []
+
+        for url, item in incoming.items():
+            digest = content_hash(item)
+            product = current.get(listed.get(url))
+            if product is None:
+                counts["added"] += 1
+                writes.append(new_product(item, None, digest))
+            elif product.get("source_hash") == digest:
+                counts["unchanged"] += 1
+            else:
+                counts["updated"] += 1
+                writes.append(apply_item(product, item, digest))
+
+        for url, product_id in listed.items():
+            product = current.get(product_id)
+            if url in incoming or product is None or remove == "keep":
+                continue
+            if remove == "delete":
+                counts["removed"] += 1
+                deletes.append(product_id)
+            elif product.get("source_hash") is not None:
+                # Already deactivated products have no hash and aren't counted again.
+                counts["removed"] += 1
+                writes.append({
+                    **product, "stock": 0, "availabilityStatus": availability(0), "source_hash": None,
+                })
+
+        if not dry_run:
+            for product in writes:
+                if product["id"] is None:
+                    product["id"] = product_ids.allocate()
+            with storage_transaction():
+                if writes:
+                    products_store.put_many(writes)
+                if deletes:
+                    products_store.delete_many(deletes)
+                    delete_product_reviews(deletes)
+
+    return counts
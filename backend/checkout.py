@@ -0,0 +1,85 @@
+from datetime import datetime
+
+from .analytics import record_order, restore_rollups
+from .locks import product_locks, user_locks
+from .pricing import price_line
+from .utils import (
+    find_user_cart, find_product, storage_transaction,
+    carts_store, orders_store, products_store, order_ids
+)
+from .write_behind import sync_writes
+
+
+class CheckoutError(Exception):
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def place_order(username):
+    """Turn the user's cart into an order.
+
+    The user's lock keeps cart edits out while the cart is turned into an
+    order. The stripes of the products in the cart are held while stock is
+    validated and reserved, so concurrent checkouts only wait for each other
+    when they buy the same products. Products, the order, the emptied cart
+    and the sales rollups are written together; if any write fails, the
+    rows written so far are put back. They are on disk before the order is
+    returned, also in write-behind mode.
+    """
+    with user_locks.hold([username]):
+        cart = find_user_cart(username)
+        if not cart or not cart.get("cart"):
+            raise CheckoutError("Cart is empty", 400)
+
+        quantities = {}
+        for item in cart["cart"]:
+            quantities[item["product_id"]] = quantities.get(item["product_id"], 0) + item["quantity"]
+
+        with product_locks.hold(quantities):
+            originals = []
+            for product_id, quantity in quantities.items():
+                product = find_product(product_id)
+                if not product:
+                    raise CheckoutError(f"Product {product_id} not found", 404)
+                if product.get("stock", 0) < quantity:
+                    raise CheckoutError(f"Not enough stock for {product['title']}", 400)
+                originals.append(dict(product))
+
+            updated = []
+            order_items = []
+            for original in originals:
+                quantity = quantities[original["id"]]
+                updated.append(dict(
+                    original,
+                    stock=original["stock"] - quantity,
+                    sold=original.get("sold", 0) + quantity,
+                ))
+                order_items.append(price_line(original, quantity))
+            total = round(sum(line["subtotal"] for line in order_items), 2)
+
+            order = {
+                "order_id": order_ids.allocate(),
+                "username": username,
+                "date": datetime.now().strftime("%Y-%m-%d"),
+                "items": order_items,
+                "total_price": total
+            }
+            original_cart = dict(cart, cart=list(cart["cart"]))
+            rollups = None
+            try:
+                with storage_transaction(), sync_writes():
+                    products_store.put_many(updated)
+                    orders_store.put(order)
+                    carts_store.put(dict(cart, cart=[]))
+                    rollups = record_order(order, originals)
+            except Exception:
+                with sync_writes():
+                    products_store.put_many(originals)
+                    orders_store.delete(order["order_id"])
+                    carts_store.put(original_cart)
+                    if rollups is not None:
+                        restore_rollups(*rollups)
+                raise
+            return order
@@ -0,0 +1,62 @@
+import os
+
+# How backend/data is persisted:
+#   "json"    - rewrite the whole JSON file on every change (default)
+#   "journal" - append each change to <file>.journal, compacted in the background
+#   "sqlite"  - keep everything in one SQLite database (see SQLITE_PATH); import
+#               the JSON files first with `python manage.py migrate-sqlite`
+STORAGE_MODE = os.environ.get("SHOP_STORAGE", "json")
+
+# In "json" mode, start each data file with integer keys from a binary
+# snapshot (<file>.snap) that is memory-mapped and decoded row by row on
+# demand, instead of parsing the whole JSON up front. Rebuilt whenever the
+# JSON file changes; set SHOP_SNAPSHOTS=0 to always parse the JSON.
+SNAPSHOTS = os.environ.get("SHOP_SNAPSHOTS", "1") == "1"
+
+# Keep products in memory as compact slot records (backend/records.py)
+# instead of dicts; worth it for large catalogs in "json"/"journal" mode.
+# `python manage.py memory-report` shows the difference for the catalog.
+COMPACT_PRODUCTS = os.environ.get("SHOP_COMPACT_PRODUCTS", "0") == "1"
+
+# Write-behind: in "json"/"journal" mode a change only updates memory and a
+# background thread writes each changed file once for many changes, so cart
+# clicks and reviews don't wait for the disk. WRITE_BEHIND_INTERVAL bounds how
+# many seconds a change can stay unwritten (what a crash can lose); a file with
+# WRITE_BEHIND_MAX_PENDING waiting changes is written right away. Checkout
+# always writes through, and pending changes are written on shutdown. Not
+# used with SHOP_MULTIPROCESS.
+WRITE_BEHIND = os.environ.get("SHOP_WRITE_BEHIND", "0") == "1"
+WRITE_BEHIND_INTERVAL = float(os.environ.get("SHOP_WRITE_BEHIND_INTERVAL", "1.0"))
+WRITE_BEHIND_MAX_PENDING = int(os.environ.get("SHOP_WRITE_BEHIND_MAX_PENDING", "1000"))
+
+# Journal records to accumulate before folding them into the JSON snapshot.
+JOURNAL_COMPACT_EVERY = int(os.environ.get("SHOP_JOURNAL_COMPACT_EVERY", "500"))
+
+# fsync every journal append (slower, survives power loss, not just crashes).
+JOURNAL_FSYNC = os.environ.get("SHOP_JOURNAL_FSYNC", "0") == "1"
+
+# Database file used when STORAGE_MODE is "sqlite".
+SQLITE_PATH = os.environ.get("SHOP_SQLITE_PATH", "backend/data/shop.db")
+
+# Cache-Control sent with catalog and product responses. The default lets
+# browsers and CDNs cache but makes them revalidate (cheap 304s via ETag).
+CATALOG_CACHE_CONTROL = os.environ.get("SHOP_CATALOG_CACHE_CONTROL", "public, no-cache")
+
+# Responses at least this large are gzip/deflate compressed when the client
+# accepts it; COMPRESS_LEVEL is the zlib level (1 fastest .. 9 smallest).
+COMPRESS_MIN_SIZE = int(os.environ.get("SHOP_COMPRESS_MIN_SIZE", "1024"))
+COMPRESS_LEVEL = int(os.environ.get("SHOP_COMPRESS_LEVEL", "6"))
+
+# Number of serialized /products responses kept for the current catalog version.
+RESPONSE_CACHE_SIZE = int(os.environ.get("SHOP_RESPONSE_CACHE_SIZE", "64"))
+
+# Set when several worker processes serve the same data files (for example
+# `gunicorn -w 4`): writes then take cross-process file locks and workers
+# learn about each other's changes through a shared counter file. Lock and
+# counter files live in SHARED_DIR. Needs a POSIX system (fcntl).
+MULTIPROCESS = os.environ.get("SHOP_MULTIPROCESS", "0") == "1"
+SHARED_DIR = os.environ.get("SHOP_SHARED_DIR", "backend/data")
+
+# Per-endpoint request/latency/storage metrics, served at /metrics in the
+# Prometheus text format. Set SHOP_METRICS=0 to remove the (small) overhead.
+METRICS = os.environ.get("SHOP_METRICS", "1") == "1"
@@ -0,0 +1,158 @@
+import mmap
+import os
+import struct
+import threading
+import zlib
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the single-process mode is available
+    fcntl = None
+
+SLOTS = 256
+SLOT = struct.Struct("<Q")
+EPOCH_SLOT = 0  # reserved for the epoch; named counters use the other slots
+
+
+def _require_fcntl():
+    if fcntl is None:
+        raise RuntimeError("SHOP_MULTIPROCESS needs fcntl (POSIX systems only)")
+
+
+class SharedCounters:
+    """Small mmap'd file of 64-bit counters shared by every worker process.
+
+    Names map onto a fixed number of slots; two names landing in the same
+    slot only cost some unnecessary reloads. Counters are only incremented
+    while the caller holds the matching FileLock.
+
+    The file also holds a random epoch, chosen when it is created. Counters
+    restart from zero if the file is deleted; the epoch tells the two apart.
+    """
+
+    def __init__(self, path):
+        _require_fcntl()
+        self.path = path
+        self._pid = None
+        self._map = None
+        self._lock = threading.Lock()
+
+    def _mapped(self):
+        # Map lazily and again after a fork, so preloading apps stay safe.
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    directory = os.path.dirname(self.path)
+                    if directory and not os.path.exists(directory):
+                        os.makedirs(directory)
+                    fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                    try:
+                        fcntl.flock(fd, fcntl.LOCK_EX)
+                        if os.fstat(fd).st_size < SLOTS * SLOT.size:
+                            os.ftruncate(fd, SLOTS * SLOT.size)
+                            epoch = int.from_bytes(os.urandom(SLOT.size), "little") or 1
+                            os.pwrite(fd, SLOT.pack(epoch), EPOCH_SLOT * SLOT.size)
+                        fcntl.flock(fd, fcntl.LOCK_UN)
+                        self._map = mmap.mmap(fd, SLOTS * SLOT.size)
+                    finally:
+                        os.close(fd)
+                    self._pid = os.getpid()
+        return self._map
+
+    def _offset(self, name):
+        return (1 + zlib.crc32(name.encode()) % (SLOTS - 1)) * SLOT.size
+
+    def epoch(self):
+        return SLOT.unpack_from(self._mapped(), EPOCH_SLOT * SLOT.size)[0]
+
+    def get(self, name):
+        return SLOT.unpack_from(self._mapped(), self._offset(name))[0]
+
+    def set(self, name, value):
+        SLOT.pack_into(self._mapped(), self._offset(name), value)
+
+    def increment(self, name):
+        value = self.get(name) + 1
+        self.set(name, value)
+        return value
+
+
+class FileLock:
+    """Exclusive flock on a lock file, re-entrant within a thread.
+
+    The lock file descriptor belongs to the process that opened it and is
+    reopened after a fork, so workers never share a lock by accident.
+    """
+
+    def __init__(self, path):
+        _require_fcntl()
+        self.path = path
+        self._pid = None
+        self._fd = None
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+
+    def _descriptor(self):
+        if self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._pid = os.getpid()
+        return self._fd
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                fcntl.flock(self._descriptor(), fcntl.LOCK_EX)
+            except BaseException:
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._depth -= 1
+        if self._depth == 0:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._thread_lock.release()
+
+
+class Coordinator:
+    """Cross-process lock and change counter for one dataset.
+
+    Writers hold `lock` while they reload, apply and persist a change and
+    then `bump()` the counter; readers compare `version()` with the value
+    they last saw, which costs one memory read instead of a stat() call.
+    """
+
+    def __init__(self, counters, lock_dir, name):
+        self.counters = counters
+        self.name = name
+        self.lock = FileLock(os.path.join(lock_dir, f".{name}.lock"))
+
+    def version(self):
+        return self.counters.get(f"version:{self.name}")
+
+    def epoch(self):
+        return self.counters.epoch()
+
+    def bump(self):
+        return self.counters.increment(f"version:{self.name}")
+
+
+class SharedSequence:
+    """Integer ids allocated across processes, never below `floor()`."""
+
+    def __init__(self, counters, lock_dir, name, floor):
+        self.counters = counters
+        self.name = name
+        self.floor = floor
+        self.lock = FileLock(os.path.join(lock_dir, f".{name}.seq.lock"))
+
+    def allocate(self):
+        with self.lock:
+            value = max(self.counters.get(f"seq:{self.name}"), self.floor())
+            self.counters.set(f"seq:{self.name}", value + 1)
+            return value
@@ -0,0 +1,126 @@
+from bisect import bisect_left, bisect_right, insort
+
+from .store import DerivedIndex
+
+# Upper bounds of the price bands reported in facet counts; the last band is open.
+PRICE_BANDS = [500, 1000, 1500, 2000, 3000, 5000]
+RATING_THRESHOLDS = [4, 3, 2, 1]
+
+
+def price_band(price):
+    lower = 0
+    for upper in PRICE_BANDS:
+        if price < upper:
+            return f"{lower}-{upper}"
+        lower = upper
+    return f"{lower}+"
+
+
+class FacetIndex(DerivedIndex):
+    """Per-facet indexes over the catalog for server-side filtering and facet counts.
+
+    Brand, availability status, price band and "rating at least N" each map
+    to a set of product ids; price and rating are also kept as sorted
+    `(value, id)` lists for arbitrary range filters. Filters and counts are
+    set intersections, never a scan over product dicts.
+    """
+
+    def __init__(self, dataset):
+        self.reset()
+        super().__init__(dataset)
+
+    def reset(self):
+        self._all = set()
+        self._entries = {}       # id -> (brand key, status, band, price, rating, in stock)
+        self._brands = {}        # brand.lower() -> set of ids
+        self._brand_labels = {}  # brand.lower() -> brand as stored
+        self._status = {}
+        self._bands = {}
+        self._rating_at_least = {t: set() for t in RATING_THRESHOLDS}
+        self._in_stock = set()
+        self._by_price = []
+        self._by_rating = []
+
+    def add(self, product):
+        pid = product[self.dataset.key]
+        brand = product.get("brand") or ""
+        key = brand.lower()
+        status = product.get("availabilityStatus") or ""
+        price = product.get("price") or 0
+        rating = product.get("rating") or 0
+        band = price_band(price)
+        in_stock = (product.get("stock") or 0) > 0
+
+        self._entries[pid] = (key, status, band, price, rating, in_stock)
+        self._all.add(pid)
+        self._brands.setdefault(key, set()).add(pid)
+        self._brand_labels.setdefault(key, brand)
+        self._status.setdefault(status, set()).add(pid)
+        self._bands.setdefault(band, set()).add(pid)
+        for threshold in RATING_THRESHOLDS:
+            if rating >= threshold:
+                self._rating_at_least[threshold].add(pid)
+        if in_stock:
+            self._in_stock.add(pid)
+        insort(self._by_price, (price, pid))
+        insort(self._by_rating, (rating, pid))
+
+    def discard(self, pid):
+        entry = self._entries.pop(pid, None)
+        if entry is None:
+            return
+        key, status, band, price, rating, _ = entry
+        self._all.discard(pid)
+        for index, value in ((self._brands, key), (self._status, status), (self._bands, band)):
+            index[value].discard(pid)
+            if not index[value]:
+                del index[value]
+                if index is self._brands:
+                    del self._brand_labels[key]
+        for ids in self._rating_at_least.values():
+            ids.discard(pid)
+        self._in_stock.discard(pid)
+        del self._by_price[bisect_left(self._by_price, (price, pid))]
+        del self._by_rating[bisect_left(self._by_rating, (rating, pid))]
+
+    def _range(self, entries, low, high):
+        start = 0 if low is None else bisect_left(entries, (low,))
+        end = len(entries) if high is None else bisect_right(entries, (high, float("inf")))
+        return {pid for _, pid in entries[start:end]}
+
+    def filter(self, brands=None, min_price=None, max_price=None, min_rating=None,
+               in_stock=False, availability=None):
+        """Ids matching every given filter, or None when no filter is set."""
+        with self.synced():
+            sets = []
+            if brands:
+                sets.append(set().union(*(self._brands.get(b.lower(), set()) for b in brands)))
+            if availability:
+                sets.append(set().union(*(self._status.get(a, set()) for a in availability)))
+            if in_stock:
+                sets.append(self._in_stock)
+            if min_price is not None or max_price is not None:
+                sets.append(self._range(self._by_price, min_price, max_price))
+            if min_rating is not None:
+                sets.append(self._range(self._by_rating, min_rating, None))
+            if not sets:
+                return None
+            sets.sort(key=len)
+            return set(sets[0]).intersection(*sets[1:])
+
+    def counts(self, ids=None):
+        """Facet counts over `ids` (the whole catalog when None)."""
+        with self.synced():
+            def count(index):
+                if ids is None:
+                    return {value: len(s) for value, s in index.items()}
+                return {value: len(s & ids) for value, s in index.items() if not s.isdisjoint(ids)}
+
+            brands = count(self._brands)
+            return {
+                "brand": {self._brand_labels[k]: n for k, n in brands.items()},
+                "price": count(self._bands),
+                "rating": {f"{t}+": n for t, n in count(self._rating_at_least).items() if n},
+                "availabilityStatus": count(self._status),
+                "in_stock": len(self._in_stock if ids is None else self._in_stock & ids),
+            }
@@ -0,0 +1,95 @@
+import base64
+import json
+from bisect import bisect_left, insort
+
+from .store import DerivedIndex
+from .utils import orders_store
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+# Orders embedded in GET /user/<username>; older ones are paged via /orders.
+RECENT_ORDERS = 5
+
+
+def encode_cursor(position):
+    return base64.urlsafe_b64encode(json.dumps(list(position)).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """(date, order_id) from a cursor returned by `OrderHistory.page`."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        date, order_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise ValueError("cursor is invalid")
+    if not isinstance(date, str) or not isinstance(order_id, int):
+        raise ValueError("cursor is invalid")
+    return date, order_id
+
+
+def summarize(order):
+    return {
+        "order_id": order["order_id"],
+        "date": order.get("date") or "",
+        "total": order.get("total_price", 0),
+        "item_count": sum(item.get("quantity", 0) for item in order.get("items", [])),
+    }
+
+
+class OrderHistory(DerivedIndex):
+    """Per-user order index, newest first, for cursor-paginated history.
+
+    Each user maps to a list of `(date, order_id)` positions kept sorted, so
+    a page is one bisect plus a slice and costs the same whatever the size
+    of the history. Order summaries are kept alongside, so `summary=true`
+    pages never touch the orders themselves.
+    """
+
+    def __init__(self, dataset):
+        self.reset()
+        super().__init__(dataset)
+
+    def reset(self):
+        self._positions = {}  # username -> sorted [(date, order_id)]
+        self._entries = {}    # order_id -> (username, summary)
+
+    def add(self, order):
+        summary = summarize(order)
+        self._entries[order["order_id"]] = (order.get("username"), summary)
+        insort(
+            self._positions.setdefault(order.get("username"), []),
+            (summary["date"], summary["order_id"]),
+        )
+
+    def discard(self, order_id):
+        entry = self._entries.pop(order_id, None)
+        if entry is None:
+            return
+        username, summary = entry
+        positions = self._positions[username]
+        del positions[bisect_left(positions, (summary["date"], order_id))]
+        if not positions:
+            del self._positions[username]
+
+    def page(self, username, limit, cursor=None):
+        """Up to `limit` summaries older than `cursor`, newest first.
+
+        Returns `(summaries, next_cursor, total)`; next_cursor is None on the
+        last page.
+        """
+        with self.synced():
+            positions = self._positions.get(username, [])
+            end = len(positions) if cursor is None else bisect_left(positions, cursor)
+            start = max(0, end - limit)
+            page = positions[start:end][::-1]
+            summaries = [self._entries[order_id][1] for _, order_id in page]
+            next_cursor = encode_cursor(page[-1]) if start > 0 and page else None
+            return summaries, next_cursor, len(positions)
+
+    def orders(self, summaries):
+        """The full orders behind `summaries`, in the same order."""
+        found = self.dataset.get_many(s["order_id"] for s in summaries)
+        return [found[s["order_id"]] for s in summaries if s["order_id"] in found]
+
+
+order_history = OrderHistory(orders_store)
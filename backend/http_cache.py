@@ -0,0 +1,107 @@
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from flask import Response, request
+
+from . import config
+from .responses import etag_variants
+
+
+class Revisions:
+    """Catalog version and per-row revisions used for ETag/Last-Modified headers.
+
+    Every put/delete on the dataset bumps the catalog version and the
+    revision of the rows involved; a full reload bumps a generation that
+    invalidates every row at once. ETags also carry a token that is unique
+    to this process, so a restart can never produce a false 304.
+
+    When workers share the data through a coordinator, the tags come from
+    the shared counter instead, so every worker gives the same data the
+    same tag: the catalog tag is the counter's epoch and value, and a row
+    tag adds its key (any change then invalidates every row).
+
+    Modification times are kept exact. Last-Modified only has whole seconds,
+    so it is left out of responses built in the same second as the last
+    change: any later change then falls in a later second than the value
+    the client holds, and If-Modified-Since cannot yield a stale 304.
+    """
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self._lock = threading.Lock()
+        self._epoch = uuid.uuid4().hex[:8]
+        self._generation = 0
+        self._version = 0
+        self._modified = self._reloaded = time.time()
+        self._rows = {}  # key -> (revision, last modified)
+        dataset.subscribe(self._on_change)
+
+    def _on_change(self, event, rows):
+        with self._lock:
+            self._version += 1
+            self._modified = time.time()
+            if event == "reload":
+                self._generation += 1
+                self._reloaded = self._modified
+                self._rows.clear()
+                return
+            for row in rows:
+                revision, _ = self._rows.get(row[self.dataset.key], (0, 0))
+                self._rows[row[self.dataset.key]] = (revision + 1, self._modified)
+
+    def _shared_tag(self):
+        coordinator = self.dataset.coordinator
+        # The version of the data this worker holds, never a later one.
+        return f"{coordinator.epoch():x}-{self.dataset.version()}"
+
+    def catalog(self):
+        """(etag, last modified) for the catalog as a whole."""
+        self.dataset.revalidate()
+        with self._lock:
+            if self.dataset.coordinator is not None:
+                return self._shared_tag(), self._modified
+            return f"{self._epoch}-{self._version}", self._modified
+
+    def row(self, key):
+        """(etag, last modified) for a single row."""
+        self.dataset.revalidate()
+        with self._lock:
+            revision, modified = self._rows.get(key, (0, self._reloaded))
+            if self.dataset.coordinator is not None:
+                return f"{self._shared_tag()}-{key}", self._modified
+            return f"{self._epoch}-{self._generation}-{key}-{revision}", modified
+
+
+def fresh_etag(etag, last_modified):
+    """The ETag of the client's cached copy if it is current (If-None-Match /
+    If-Modified-Since), else None. With If-None-Match that is the variant
+    the client sent, so a gzip copy is confirmed with its gzip ETag."""
+    if request.if_none_match:
+        for variant in etag_variants(etag):
+            if request.if_none_match.contains(variant):
+                return variant
+        return None
+    if request.if_modified_since and int(last_modified) <= request.if_modified_since.timestamp():
+        return etag
+    return None
+
+
+def not_modified(etag, last_modified):
+    """A 304 response when the client's cached copy is current, else None."""
+    matched = fresh_etag(etag, last_modified)
+    if matched is None:
+        return None
+    response = with_validators(Response(status=304), matched, last_modified)
+    # Same Vary as the 200 it stands for, which may have been compressed.
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def with_validators(response, etag, last_modified):
+    response.set_etag(etag)
+    if int(time.time()) > int(last_modified):
+        response.last_modified = datetime.fromtimestamp(int(last_modified), tz=timezone.utc)
+    response.headers["Cache-Control"] = config.CATALOG_CACHE_CONTROL
+    return response
@@ -0,0 +1,140 @@
+import json
+import os
+import threading
+import time
+
+from . import metrics
+from .records import json_default
+from .store import Dataset
+
+
+class JournaledDataset(Dataset):
+    """Dataset that appends each change to a journal instead of rewriting the file.
+
+    The JSON file is treated as a snapshot and `<file>.journal` holds one
+    compact JSON record per line:
+
+        {"op": "put", "row": {...}}
+        {"op": "delete", "key": ...}
+
+    Records carry the full new state of a row, so replaying them is idempotent
+    and a crash between writing a snapshot and truncating the journal is
+    harmless. A torn final line left by a crash is ignored on replay and cut
+    off before the next append, so later records never follow it. Once the
+    journal holds `compact_every` records a background thread folds it into a
+    fresh snapshot, written to a temporary file and renamed into place.
+    """
+
+    def __init__(self, path, default=None, compact_every=500, fsync=False, **options):
+        super().__init__(path, default, **options)
+        self.journal_path = f"{path}.journal"
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self._journal_records = 0
+        self._torn_at = None  # journal size up to the last complete record, if a torn one follows
+        self._compacting = False
+
+    def _stat(self):
+        snapshot = super()._stat()
+        try:
+            st = os.stat(self.journal_path)
+            journal = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            journal = None
+        return (snapshot, journal)
+
+    def _load_data(self):
+        super()._load_data()
+        self._journal_records = self._replay()
+        if self._journal_records >= self.compact_every:
+            self._schedule_compaction()
+
+    def _replay(self):
+        self._torn_at = None
+        if not os.path.exists(self.journal_path):
+            return 0
+        count = 0
+        size = 0
+        parsing = 0.0
+        with open(self.journal_path, "rb") as f:
+            for line in f:
+                started = time.perf_counter()
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("incomplete record")
+                    record = json.loads(line)
+                except ValueError:
+                    self._torn_at = size
+                    break
+                parsing += time.perf_counter() - started
+                size += len(line)
+                if record["op"] == "put":
+                    self._upsert(record["row"])
+                elif record["op"] == "delete":
+                    self._remove(record["key"])
+                count += 1
+        if metrics.enabled:
+            metrics.record_read(os.path.basename(self.journal_path), size, parsing)
+        return count
+
+    # Persistence
+
+    def _persist(self):
+        self._write_snapshot()
+
+    def _persist_rows(self, rows):
+        self._append([{"op": "put", "row": row} for row in rows])
+
+    def _persist_delete(self, keys):
+        self._append([{"op": "delete", "key": key} for key in keys])
+
+    def _append(self, records):
+        started = time.perf_counter()
+        lines = "".join(json.dumps(r, separators=(",", ":"), default=json_default) + "\n" for r in records).encode()
+        if metrics.enabled:
+            metrics.record_write(
+                os.path.basename(self.journal_path), len(lines), time.perf_counter() - started
+            )
+        with open(self.journal_path, "ab") as f:
+            if self._torn_at is not None:
+                # Appends go to the (new) end of the file, after the last good record.
+                f.truncate(self._torn_at)
+                self._torn_at = None
+            f.write(lines)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        self._signature = self._written()
+        self._journal_records += len(records)
+        if self._journal_records >= self.compact_every:
+            self._schedule_compaction()
+
+    # Compaction
+
+    def _schedule_compaction(self):
+        if self._compacting:
+            return
+        self._compacting = True
+        # Not a daemon: interpreter shutdown waits for a snapshot in progress.
+        threading.Thread(target=self.compact).start()
+
+    def compact(self):
+        """Fold the journal into the snapshot and start a new, empty journal."""
+        try:
+            with self._lock, self._exclusive():
+                if self.data is None:
+                    return
+                # Another worker may have appended since our last load.
+                self.load()
+                self._write_snapshot()
+        finally:
+            self._compacting = False
+
+    def _write_snapshot(self):
+        self._write(self.data, fsync=True)
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self._journal_records = 0
+        self._torn_at = None
+        self._signature = self._written()
+        self._dirty = False
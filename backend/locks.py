@@ -0,0 +1,83 @@
+import os
+import threading
+import zlib
+from contextlib import contextmanager
+
+from . import config
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class StripedLocks:
+    """A fixed pool of locks shared out by key hash.
+
+    Holding the locks for a set of keys serializes work on those keys only,
+    so two checkouts contend only when their carts share a stripe. Stripes
+    are always taken in index order, which rules out deadlocks between
+    callers locking overlapping sets.
+
+    With a `lock_path` every stripe is also a one-byte fcntl record lock in
+    that file, so the stripes are shared by all worker processes.
+    """
+
+    def __init__(self, stripes=256, lock_path=None):
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self.lock_path = lock_path
+        self._pid = None
+        self._fd = None
+
+    def _stripes(self, keys):
+        # crc32 rather than hash(): str hashes differ between processes.
+        return sorted({zlib.crc32(str(key).encode()) % len(self._locks) for key in keys})
+
+    def _descriptor(self):
+        if self._pid != os.getpid():
+            directory = os.path.dirname(self.lock_path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            self._fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._pid = os.getpid()
+        return self._fd
+
+    def _acquire(self, i):
+        self._locks[i].acquire()
+        if self.lock_path is not None:
+            try:
+                fcntl.lockf(self._descriptor(), fcntl.LOCK_EX, 1, i)
+            except BaseException:
+                self._locks[i].release()
+                raise
+
+    def _release(self, i):
+        if self.lock_path is not None:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, i)
+        self._locks[i].release()
+
+    @contextmanager
+    def hold(self, keys):
+        stripes = self._stripes(keys)
+        acquired = []
+        try:
+            for i in stripes:
+                self._acquire(i)
+                acquired.append(i)
+            yield
+        finally:
+            for i in reversed(acquired):
+                self._release(i)
+
+
+def _lock_path(name):
+    if not config.MULTIPROCESS:
+        return None
+    if fcntl is None:
+        raise RuntimeError("SHOP_MULTIPROCESS needs fcntl (POSIX systems only)")
+    return os.path.join(config.SHARED_DIR, f".{name}.locks")
+
+
+product_locks = StripedLocks(lock_path=_lock_path("products"))
+user_locks = StripedLocks(lock_path=_lock_path("users"))
+sales_locks = StripedLocks(lock_path=_lock_path("sales"))
@@ -0,0 +1,174 @@
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Response, g, request
+
+from . import config
+
+# Seconds; the usual Prometheus client defaults, plus a finer low end.
+LATENCY_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+
+enabled = config.METRICS
+_context = threading.local()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for values, total in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, values)} {total}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = list(buckets)
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            if i < len(self.buckets):
+                series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for values, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    lines.append(
+                        f"{self.name}_bucket{_labels(self.labels, values, [('le', bound)])} {cumulative}"
+                    )
+                lines.append(f"{self.name}_bucket{_labels(self.labels, values, [('le', '+Inf')])} {series[-1]}")
+                lines.append(f"{self.name}_sum{_labels(self.labels, values)} {series[-2]}")
+                lines.append(f"{self.name}_count{_labels(self.labels, values)} {series[-1]}")
+        return lines
+
+
+requests_total = Counter(
+    "shop_http_requests_total", "HTTP requests by endpoint, method and status.",
+    ["endpoint", "method", "status"])
+request_seconds = Histogram(
+    "shop_http_request_duration_seconds", "Request handling time, including serialization and compression.",
+    ["endpoint", "method"])
+storage_calls = Counter(
+    "shop_storage_calls_total", "Dataset operations (load = read access, save = write) by endpoint.",
+    ["endpoint", "dataset", "op"])
+storage_read_bytes = Counter(
+    "shop_storage_read_bytes_total", "Bytes read from data files by endpoint.", ["endpoint", "dataset"])
+storage_written_bytes = Counter(
+    "shop_storage_written_bytes_total", "Bytes written to data files by endpoint.", ["endpoint", "dataset"])
+storage_parse_seconds = Counter(
+    "shop_storage_parse_seconds_total", "Time spent parsing data files by endpoint.", ["endpoint", "dataset"])
+storage_serialize_seconds = Counter(
+    "shop_storage_serialize_seconds_total", "Time spent serializing data files by endpoint.",
+    ["endpoint", "dataset"])
+
+REGISTRY = [
+    requests_total, request_seconds, storage_calls, storage_read_bytes, storage_written_bytes,
+    storage_parse_seconds, storage_serialize_seconds,
+]
+
+
+def _endpoint():
+    # Storage work outside a request (startup, background compaction).
+    return getattr(_context, "endpoint", "background")
+
+
+# Storage hooks; callers check `metrics.enabled` first so they cost nothing when off.
+
+def record_call(dataset, op):
+    storage_calls.inc((_endpoint(), dataset, op))
+
+
+def record_read(dataset, size, seconds):
+    endpoint = _endpoint()
+    storage_read_bytes.inc((endpoint, dataset), size)
+    storage_parse_seconds.inc((endpoint, dataset), seconds)
+
+
+def record_write(dataset, size, seconds):
+    endpoint = _endpoint()
+    storage_written_bytes.inc((endpoint, dataset), size)
+    storage_serialize_seconds.inc((endpoint, dataset), seconds)
+
+
+# Request instrumentation
+
+def _start():
+    _context.endpoint = request.endpoint or "unmatched"
+    g.metrics_started = time.perf_counter()
+
+
+def _finish(response):
+    started = g.pop("metrics_started", None)
+    if started is not None:
+        endpoint = request.endpoint or "unmatched"
+        request_seconds.observe((endpoint, request.method), time.perf_counter() - started)
+        requests_total.inc((endpoint, request.method, str(response.status_code)))
+    return response
+
+
+def _teardown(exc):
+    # An unhandled exception skips after_request hooks; count it as a 500.
+    if exc is not None:
+        _finish(Response(status=500))
+    _context.endpoint = "background"
+
+
+def render():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view():
+    return Response(render(), mimetype="text/plain; version=0.0.4")
+
+
+def init_app(app):
+    """Time every request and serve /metrics, unless SHOP_METRICS=0.
+
+    Call before registering other after_request hooks, so the recorded time
+    includes everything they do (e.g. compression).
+    """
+    if not enabled:
+        return
+    app.before_request(_start)
+    app.after_request(_finish)
+    app.teardown_request(_teardown)
+    app.add_url_rule("/metrics", "metrics", metrics_view)
@@ -0,0 +1,52 @@
+from .utils import products_store
+
+
+def unit_price(product):
+    """Price of one unit after the product's discountPercentage, in cents precision."""
+    discount = product.get("discountPercentage") or 0
+    return round(product["price"] * (100 - discount) / 100, 2)
+
+
+def price_line(product, quantity):
+    """One priced cart/order line for `quantity` units of `product`."""
+    unit = unit_price(product)
+    return {
+        "product_id": product["id"],
+        "title": product["title"],
+        "quantity": quantity,
+        "price": product["price"],
+        "discountPercentage": product.get("discountPercentage") or 0,
+        "unit_price": unit,
+        "subtotal": round(unit * quantity, 2),
+    }
+
+
+def price_items(items, products):
+    """Price cart `items` against `products` ({id: product}).
+
+    Lines whose product no longer exists are left out and their ids listed
+    under "missing". "subtotal" is the total before discounts, "discount"
+    what the discounts take off it.
+    """
+    lines = []
+    missing = []
+    for item in items:
+        product = products.get(item["product_id"])
+        if product is None:
+            missing.append(item["product_id"])
+            continue
+        lines.append(price_line(product, item["quantity"]))
+    subtotal = round(sum(line["price"] * line["quantity"] for line in lines), 2)
+    total = round(sum(line["subtotal"] for line in lines), 2)
+    return {
+        "items": lines,
+        "subtotal": subtotal,
+        "discount": round(subtotal - total, 2),
+        "total": total,
+        "missing": missing,
+    }
+
+
+def price_cart(items):
+    """Price cart `items`, resolving every product in one catalog lookup."""
+    return price_items(items, products_store.get_many(item["product_id"] for item in items))
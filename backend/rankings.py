@@ -0,0 +1,59 @@
+from bisect import bisect_left, insort
+
+from .store import DerivedIndex
+from .utils import calculate_product_rating
+
+RANKINGS = ["sold", "rating"]
+DEFAULT_K = 10
+MAX_K = 100
+
+
+def ranking_value(product, by):
+    if by == "rating":
+        return calculate_product_rating(product)
+    return product.get("sold") or 0
+
+
+class RankingIndex(DerivedIndex):
+    """Products ranked by units sold and by rating, overall and per brand.
+
+    Each ranking is a sorted list of `(value, -id)` positions, so the top k
+    is the last k entries and ties go to the older product. A sale, review
+    or admin edit re-files only the product involved (two bisects per
+    list), and a top-k query never looks at the rest of the catalog.
+    """
+
+    def __init__(self, dataset):
+        self.reset()
+        super().__init__(dataset)
+
+    def reset(self):
+        self._entries = {}  # id -> (brand key, {by: value})
+        self._ranked = {by: {None: []} for by in RANKINGS}  # by -> brand key (None = all) -> positions
+
+    def add(self, product):
+        pid = product[self.dataset.key]
+        brand = (product.get("brand") or "").lower()
+        values = {by: ranking_value(product, by) for by in RANKINGS}
+        self._entries[pid] = (brand, values)
+        for by, value in values.items():
+            insort(self._ranked[by][None], (value, -pid))
+            insort(self._ranked[by].setdefault(brand, []), (value, -pid))
+
+    def discard(self, pid):
+        entry = self._entries.pop(pid, None)
+        if entry is None:
+            return
+        brand, values = entry
+        for by, value in values.items():
+            for scope in (None, brand):
+                positions = self._ranked[by][scope]
+                del positions[bisect_left(positions, (value, -pid))]
+                if not positions and scope is not None:
+                    del self._ranked[by][scope]
+
+    def top(self, by, k, brand=None):
+        """Ids of the `k` highest-ranked products by `by`, best first."""
+        with self.synced():
+            positions = self._ranked[by].get(brand.lower() if brand else None, [])
+            return [-negated for _, negated in reversed(positions[-k:])]
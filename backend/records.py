@@ -0,0 +1,149 @@
+import json
+import sys
+import tracemalloc
+from collections.abc import MutableMapping
+
+# Product fields held in slots, in the order they are written out. Anything
+# else a product carries goes to a small per-record dict.
+PRODUCT_FIELDS = (
+    "id", "title", "description", "price", "discountPercentage", "rating", "stock",
+    "brand", "category", "weight", "dimensions", "warrantyInformation",
+    "shippingInformation", "availabilityStatus", "images", "thumbnail",
+    "review_count", "rating_sum", "stars", "sold", "specs", "url", "source_hash",
+)
+# Low-cardinality strings shared by many products; one copy of each is kept.
+INTERNED_FIELDS = frozenset([
+    "brand", "category", "availabilityStatus", "warrantyInformation", "shippingInformation",
+])
+DIMENSIONS = ("width", "height", "depth")
+
+_MISSING = object()
+
+
+def _pack(field, value):
+    if field in INTERNED_FIELDS and type(value) is str:
+        return sys.intern(value)
+    if field == "dimensions" and type(value) is dict and tuple(value) == DIMENSIONS:
+        # (width, height, depth) instead of a three-key dict of its own.
+        return tuple(value.values())
+    return value
+
+
+def _unpack(field, value):
+    if field == "dimensions" and type(value) is tuple:
+        return dict(zip(DIMENSIONS, value))
+    return value
+
+
+class ProductRecord(MutableMapping):
+    """A product with its known fields in slots instead of a dict.
+
+    Behaves like the product dict it replaces (`record["price"]`, `.get`,
+    `.update`, `dict(record)`, `in`, ...), but has no per-row hash table:
+    each known field costs one slot, repeated strings such as the brand or
+    shipping text point at a single interned copy, and `dimensions` is a
+    tuple. Unknown fields still work, in a dict that only exists when needed.
+
+    `project()` gives the JSON shape the routes return: a dict referring to
+    the record's own values, nothing is copied but the top level.
+    """
+
+    __slots__ = PRODUCT_FIELDS + ("_extra",)
+
+    def __init__(self, fields=()):
+        self._extra = None
+        self.update(fields)
+
+    def __getitem__(self, field):
+        if field in _SLOTS:
+            value = getattr(self, field, _MISSING)
+        else:
+            value = self._extra.get(field, _MISSING) if self._extra else _MISSING
+        if value is _MISSING:
+            raise KeyError(field)
+        return _unpack(field, value)
+
+    def __setitem__(self, field, value):
+        value = _pack(field, value)
+        if field in _SLOTS:
+            setattr(self, field, value)
+        elif self._extra is None:
+            self._extra = {field: value}
+        else:
+            self._extra[field] = value
+
+    def __delitem__(self, field):
+        if field in _SLOTS:
+            if getattr(self, field, _MISSING) is _MISSING:
+                raise KeyError(field)
+            delattr(self, field)
+        elif self._extra and field in self._extra:
+            del self._extra[field]
+        else:
+            raise KeyError(field)
+
+    def __contains__(self, field):
+        if field in _SLOTS:
+            return hasattr(self, field)
+        return bool(self._extra) and field in self._extra
+
+    def __iter__(self):
+        for field in PRODUCT_FIELDS:
+            if hasattr(self, field):
+                yield field
+        if self._extra:
+            yield from list(self._extra)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def get(self, field, default=None):
+        try:
+            return self[field]
+        except KeyError:
+            return default
+
+    def project(self, fields=None):
+        """The product as a plain dict (only `fields`, if given), sharing this record's values."""
+        if fields is None:
+            return {field: self[field] for field in self}
+        return {field: self[field] for field in fields if field in self}
+
+    def __repr__(self):
+        return f"ProductRecord({self.project()!r})"
+
+
+_SLOTS = frozenset(PRODUCT_FIELDS)
+
+
+def json_default(value):
+    """`default=` for json/orjson, so compact records serialize as their JSON shape."""
+    if isinstance(value, ProductRecord):
+        return value.project()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _allocated(build, raw):
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        rows = build(raw)
+        size = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    return rows, size
+
+
+def memory_report(raw):
+    """Bytes taken by the products in the JSON text `raw`, as dicts and as records."""
+    dicts, dict_size = _allocated(json.loads, raw)
+    records, record_size = _allocated(lambda text: [ProductRecord(p) for p in json.loads(text)], raw)
+    count = len(dicts)
+    return {
+        "products": count,
+        "dict_bytes": dict_size,
+        "record_bytes": record_size,
+        "dict_bytes_per_product": dict_size // count if count else 0,
+        "record_bytes_per_product": record_size // count if count else 0,
+        "saved": round(1 - record_size / dict_size, 3) if dict_size else 0,
+    }
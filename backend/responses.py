@@ -0,0 +1,144 @@
+import gzip
+import json
+import threading
+import zlib
+from collections import OrderedDict
+
+from flask import current_app, request
+from flask.json.provider import JSONProvider
+
+from . import config
+from .records import json_default
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ENCODINGS = ["gzip", "deflate"]
+COMPRESSIBLE = ("application/json", "application/x-ndjson", "text/")
+
+
+class FastJSONProvider(JSONProvider):
+    """JSON provider that uses orjson when it is installed and the stdlib otherwise.
+
+    Keys are written in insertion order (no sort) in both cases, which is
+    noticeably cheaper than Flask's default for large catalog payloads.
+    """
+
+    mimetype = "application/json"
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.dumps(obj, default=json_default, option=orjson.OPT_NON_STR_KEYS).decode()
+        kwargs.setdefault("default", json_default)
+        kwargs.setdefault("ensure_ascii", False)
+        kwargs.setdefault("separators", (",", ":"))
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = self.dumps(obj).encode()
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def encode(body, encoding):
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=config.COMPRESS_LEVEL, mtime=0)
+    return zlib.compress(body, config.COMPRESS_LEVEL)
+
+
+class EncodedBody:
+    """A serialized response body plus its compressed variants, built on demand."""
+
+    def __init__(self, body):
+        self.body = body
+        self._encoded = {}
+
+    def encoded(self, encoding):
+        data = self._encoded.get(encoding)
+        if data is None:
+            data = self._encoded[encoding] = encode(self.body, encoding)
+        return data
+
+
+class ResponseCache:
+    """Serialized responses keyed by (validator, request URL), least recently used first out.
+
+    The validator is the catalog ETag, so entries for an older catalog
+    version are never hit again and simply age out.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, validator, key):
+        with self._lock:
+            entry = self._entries.get((validator, key))
+            if entry is not None:
+                self._entries.move_to_end((validator, key))
+            return entry
+
+    def put(self, validator, key, body):
+        entry = EncodedBody(body)
+        with self._lock:
+            self._entries[(validator, key)] = entry
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return entry
+
+    def respond(self, validator, build):
+        """Response for the current request, from cache or from `build()`.
+
+        `build` returns a (response, status) pair; only 200 responses are cached.
+        """
+        key = request.full_path
+        entry = self.get(validator, key)
+        if entry is None:
+            response, status = build()
+            if status != 200:
+                return response, status
+            entry = self.put(validator, key, response.get_data())
+        else:
+            response = current_app.response_class(entry.body, mimetype="application/json")
+        response.encoded_body = entry
+        return response, 200
+
+
+def etag_variants(etag):
+    """The ETag a response may carry in each content coding."""
+    return [etag] + [f"{etag}-{encoding}" for encoding in ENCODINGS]
+
+
+def compress_response(response):
+    """after_request hook: gzip/deflate large bodies the client accepts."""
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or response.is_streamed
+        or "Content-Encoding" in response.headers
+        or not (response.mimetype or "").startswith(COMPRESSIBLE)
+    ):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = request.accept_encodings.best_match(ENCODINGS)
+    if encoding is None:
+        return response
+    entry = getattr(response, "encoded_body", None)
+    body = entry.body if entry is not None else response.get_data()
+    if len(body) < config.COMPRESS_MIN_SIZE:
+        return response
+    response.set_data(entry.encoded(encoding) if entry is not None else encode(body, encoding))
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        # A strong ETag must differ between content codings.
+        response.set_etag(f"{etag}-{encoding}", weak)
+    return response
@@ -0,0 +1,101 @@
+import base64
+import json
+from bisect import bisect_left, insort
+
+from .history import encode_cursor
+from .store import DerivedIndex
+from .utils import reviews_store
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+# Reviews embedded in GET /products/<id>; the rest are paged via /products/<id>/reviews.
+PREVIEW_REVIEWS = 3
+REVIEW_SORTS = ["newest", "rating"]
+
+
+def position(review, sort):
+    """Sort key of `review`; pages run from the largest position down."""
+    if sort == "rating":
+        return (review.get("rating", 5), review.get("date") or "", review["review_id"])
+    return (review.get("date") or "", review["review_id"])
+
+
+def decode_cursor(cursor, sort):
+    """Position from a cursor returned by `ReviewIndex.page` for the same sort."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise ValueError("cursor is invalid")
+    types = ((int, float), str, int) if sort == "rating" else (str, int)
+    if (
+        not isinstance(values, list)
+        or len(values) != len(types)
+        or not all(isinstance(v, t) and not isinstance(v, bool) for v, t in zip(values, types))
+    ):
+        raise ValueError("cursor is invalid")
+    return tuple(values)
+
+
+class ReviewIndex(DerivedIndex):
+    """Per-product review positions for each sort, for cursor-paginated reviews.
+
+    Like the order history, a page is one bisect plus a slice over a sorted
+    list of positions; the reviews themselves are then fetched by key. Star
+    counts per product are kept alongside for the review summary.
+    """
+
+    def __init__(self, dataset):
+        self.reset()
+        super().__init__(dataset)
+
+    def reset(self):
+        self._positions = {sort: {} for sort in REVIEW_SORTS}  # sort -> product id -> sorted positions
+        self._entries = {}  # review_id -> (product id, {sort: position}, stars)
+        self._stars = {}    # product id -> review count per star, 1 to 5
+
+    def add(self, review):
+        product_id = review.get("product_id")
+        positions = {sort: position(review, sort) for sort in REVIEW_SORTS}
+        stars = min(5, max(1, round(review.get("rating", 5))))
+        self._entries[review["review_id"]] = (product_id, positions, stars)
+        for sort, pos in positions.items():
+            insort(self._positions[sort].setdefault(product_id, []), pos)
+        self._stars.setdefault(product_id, [0] * 5)[stars - 1] += 1
+
+    def discard(self, review_id):
+        entry = self._entries.pop(review_id, None)
+        if entry is None:
+            return
+        product_id, positions, stars = entry
+        for sort, pos in positions.items():
+            sorted_positions = self._positions[sort][product_id]
+            del sorted_positions[bisect_left(sorted_positions, pos)]
+            if not sorted_positions:
+                del self._positions[sort][product_id]
+        self._stars[product_id][stars - 1] -= 1
+
+    def page(self, product_id, limit, cursor=None, sort="newest"):
+        """Up to `limit` reviews after `cursor` in `sort` order.
+
+        Returns `(reviews, next_cursor, total)`; next_cursor is None on the
+        last page.
+        """
+        with self.synced():
+            positions = self._positions[sort].get(product_id, [])
+            end = len(positions) if cursor is None else bisect_left(positions, cursor)
+            start = max(0, end - limit)
+            page = positions[start:end][::-1]
+            next_cursor = encode_cursor(page[-1]) if start > 0 and page else None
+            total = len(positions)
+        found = self.dataset.get_many(pos[-1] for pos in page)
+        return [found[pos[-1]] for pos in page if pos[-1] in found], next_cursor, total
+
+    def stars(self, product_id):
+        """{"1": count, ..., "5": count} for the product's reviews."""
+        with self.synced():
+            counts = self._stars.get(product_id, [0] * 5)
+            return {str(star): counts[star - 1] for star in range(1, 6)}
+
+
+review_index = ReviewIndex(reviews_store)
@@ -0,0 +1,48 @@
+from datetime import date
+
+from flask import Blueprint, request, jsonify
+from ..analytics import sales_index, GROUPS
+
+analytics_bp = Blueprint('analytics', __name__)
+
+def parse_day(value, name):
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise ValueError(f"{name} must be a date (YYYY-MM-DD)")
+
+@analytics_bp.route("/admin/analytics/sales", methods=["GET"])
+def sales_report():
+    """Units sold, revenue and orders per day, brand or product, from the sales rollups."""
+    args = request.args
+    group_by = args.get("group_by", "day")
+    try:
+        if group_by not in GROUPS:
+            raise ValueError(f"group_by must be one of {', '.join(GROUPS)}")
+        start = parse_day(args["from"], "from") if args.get("from") else None
+        end = parse_day(args["to"], "to") if args.get("to") else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    totals = sales_index.report(group_by, start, end)
+    rows = []
+    for value, total in totals.items():
+        row = {"units": total["units"], "revenue": round(total["revenue"], 2), "orders": total["orders"]}
+        if group_by == "product":
+            row = {"product_id": int(value) if value.isdigit() else value, "title": total["label"], **row}
+        else:
+            row = {group_by: value, **row}
+        rows.append(row)
+    if group_by != "day":
+        rows.sort(key=lambda r: r["revenue"], reverse=True)
+
+    return jsonify({
+        "group_by": group_by,
+        "from": start,
+        "to": end,
+        "totals": {
+            "units": sum(r["units"] for r in rows),
+            "revenue": round(sum(r["revenue"] for r in rows), 2),
+        },
+        "rows": rows,
+    }), 200
@@ -1,35 +1,22 @@
 from flask import Blueprint, request, jsonify
-from ..utils import (
-    load_json, save_json, find_user_cart, find_user, find_product,
-    CARTS_FILE, USERS_FILE, PRODUCTS_FILE
-)
+from ..locks import user_locks
+from ..pricing import price_cart
+from ..utils import find_user_cart, find_user, find_product, carts_store, products_store
 
 cart_bp = Blueprint('cart', __name__)
 
+CART_OPS = ["add", "update", "remove"]
+
 @cart_bp.route("/cart/<username>", methods=["GET"])
 def get_cart(username):
     user = find_user(username)
     if not user:
         return jsonify({"error": "User not found"}), 404
 
-    carts = load_json(CARTS_FILE)
-    cart = next((c for c in carts if c["username"] == username), None)
-    
-    if not cart:
-        return jsonify({"items": [], "total": 0}), 200
-    
-    products = load_json(PRODUCTS_FILE)
-    total = 0
-    for item in cart.get("cart", []):
-        product = find_product(item["product_id"])
-        if product:
-            total += product["price"] * item["quantity"]
-    
-    return jsonify({
-        "username": username,
-        "items": cart.get("cart", []),
-        "total": total
-    }), 200
+    cart = find_user_cart(username)
+    items = cart.get("cart", []) if cart else []
+
+    return jsonify({"username": username, **price_cart(items)}), 200
 
 @cart_bp.route("/cart/<username>/add", methods=["POST"])
 def add_to_cart(username):
@@ -45,23 +32,20 @@ def add_to_cart(username):
     if not product:
         return jsonify({"error": "Product not found"}), 404
 
-    carts = load_json(CARTS_FILE)
-    cart = next((c for c in carts if c["username"] == username), None)
-    
-    if not cart:
-        cart = {"username": username, "cart": []}
-        carts.append(cart)
-    
-    item = next((i for i in cart["cart"] if i["product_id"] == product_id), None)
-    if item:
-        item["quantity"] += quantity
-    else:
-        cart["cart"].append({
-            "product_id": product_id,
-            "quantity": quantity
-        })
-    
-    save_json(CARTS_FILE, carts)
+    with user_locks.hold([username]):
+        cart = find_user_cart(username) or {"username": username, "cart": []}
+        items = [dict(i) for i in cart["cart"]]
+
+        item = next((i for i in items if i["product_id"] == product_id), None)
+        if item:
+            item["quantity"] += quantity
+        else:
+            items.append({
+                "product_id": product_id,
+                "quantity": quantity
+            })
+
+        carts_store.put(dict(cart, cart=items))
     return jsonify({"message": "Item added to cart"}), 200
 
 @cart_bp.route("/cart/<username>/remove", methods=["POST"])
@@ -73,12 +57,12 @@ def remove_from_cart(username):
     data = request.get_json()
     product_id = data.get("product_id")
 
-    carts = load_json(CARTS_FILE)
-    cart = next((c for c in carts if c["username"] == username), None)
-    
-    if cart:
-        cart["cart"] = [i for i in cart["cart"] if i["product_id"] != product_id]
-        save_json(CARTS_FILE, carts)
+    with user_locks.hold([username]):
+        cart = find_user_cart(username)
+        
+        if cart:
+            items = [i for i in cart["cart"] if i["product_id"] != product_id]
+            carts_store.put(dict(cart, cart=items))
     
     return jsonify({"message": "Item removed from cart"}), 200
 
@@ -95,14 +79,83 @@ def update_cart(username):
     if quantity < 1:
         return jsonify({"error": "Quantity must be at least 1"}), 400
 
-    carts = load_json(CARTS_FILE)
-    cart = next((c for c in carts if c["username"] == username), None)
-    
-    if cart:
-        item = next((i for i in cart["cart"] if i["product_id"] == product_id), None)
-        if item:
-            item["quantity"] = quantity
-            save_json(CARTS_FILE, carts)
+    with user_locks.hold([username]):
+        cart = find_user_cart(username)
+        
+        if cart and any(i["product_id"] == product_id for i in cart["cart"]):
+            items = [
+                dict(i, quantity=quantity) if i["product_id"] == product_id else i
+                for i in cart["cart"]
+            ]
+            carts_store.put(dict(cart, cart=items))
             return jsonify({"message": "Cart updated"}), 200
     
     return jsonify({"error": "Item not in cart"}), 404
+
+def validate_op(op):
+    """Error message for a malformed batch op, or None."""
+    if not isinstance(op, dict):
+        return "must be an object"
+    if op.get("op") not in CART_OPS:
+        return f"op must be one of {', '.join(CART_OPS)}"
+    if op.get("product_id") is None:
+        return "product_id is required"
+    if op["op"] != "remove":
+        quantity = op.get("quantity", 1)
+        if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity < 1:
+            return "Quantity must be at least 1"
+    return None
+
+@cart_bp.route("/cart/<username>/batch", methods=["POST"])
+def batch_cart(username):
+    """Apply a list of add/update/remove ops with a single cart write.
+
+    Ops run in order and all-or-nothing: if one fails, the cart is left
+    unchanged. Responds with the priced cart.
+    """
+    user = find_user(username)
+    if not user:
+        return jsonify({"error": "User not found"}), 404
+
+    data = request.get_json()
+    ops = data.get("ops") if isinstance(data, dict) else None
+    if not isinstance(ops, list) or not ops:
+        return jsonify({"error": "ops must be a non-empty list"}), 400
+    for position, op in enumerate(ops):
+        error = validate_op(op)
+        if error:
+            return jsonify({"error": f"op {position}: {error}"}), 400
+
+    added = {op["product_id"] for op in ops if op["op"] == "add"}
+    found = products_store.get_many(added)
+    for product_id in added:
+        if product_id not in found:
+            return jsonify({"error": f"Product {product_id} not found"}), 404
+
+    with user_locks.hold([username]):
+        cart = find_user_cart(username) or {"username": username, "cart": []}
+        items = [dict(i) for i in cart["cart"]]
+        by_id = {}
+        for item in items:
+            by_id.setdefault(item["product_id"], item)
+
+        for position, op in enumerate(ops):
+            product_id = op["product_id"]
+            item = by_id.get(product_id)
+            if op["op"] == "add":
+                if item:
+                    item["quantity"] += op.get("quantity", 1)
+                else:
+                    item = by_id[product_id] = {"product_id": product_id, "quantity": op.get("quantity", 1)}
+                    items.append(item)
+            elif op["op"] == "update":
+                if not item:
+                    return jsonify({"error": f"op {position}: Item not in cart"}), 404
+                item["quantity"] = op.get("quantity", 1)
+            else:
+                items = [i for i in items if i["product_id"] != product_id]
+                by_id.pop(product_id, None)
+
+        carts_store.put(dict(cart, cart=items))
+
+    return jsonify({"message": "Cart updated", "username": username, **price_cart(items)}), 200
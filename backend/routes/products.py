@@ -1,94 +1,244 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 from datetime import datetime
+from ..catalog import (
+    parse_int, parse_fields, parse_filters, parse_sort, sort_products, project, present,
+    paginate, page_of,
+    build_product, REQUIRED_FIELDS,
+    search_index, facet_index, ranking_index, product_revisions, listing_cache,
+    DEFAULT_LIMIT, MAX_LIMIT
+)
+from ..bulk import BulkImport, export_lines, validate_fields
+from ..http_cache import not_modified, with_validators
+from ..locks import product_locks
+from ..rankings import RANKINGS, DEFAULT_K, MAX_K
+from ..reviews import (
+    review_index, decode_cursor, PREVIEW_REVIEWS, REVIEW_SORTS,
+    DEFAULT_LIMIT as REVIEWS_LIMIT, MAX_LIMIT as MAX_REVIEWS_LIMIT
+)
 from ..utils import (
-    load_json, save_json, calculate_product_rating, find_product,
-    PRODUCTS_FILE
+    calculate_product_rating, add_rating, find_product, products_store, product_ids,
+    reviews_store, review_ids, delete_product_reviews, storage_transaction
 )
 
 products_bp = Blueprint('products', __name__)
 
 @products_bp.route("/products", methods=["GET"])
 def get_products():
-    products = load_json(PRODUCTS_FILE)
-    
-    query = request.args.get("q", "").lower()
-    if query:
-        products = [p for p in products if query in p.get("title", "").lower() or query in p.get("brand", "").lower()]
-    
-    for p in products:
-        if "sold" not in p:
-            p["sold"] = 0
-    
-    return jsonify(products), 200
+    etag, modified = product_revisions.catalog()
+    response = not_modified(etag, modified)
+    if response is not None:
+        return response
+
+    # Unchanged catalog + same query string: reuse the serialized (and
+    # compressed) body instead of building it again.
+    response, status = listing_cache.respond(etag, list_products)
+    if status == 200:
+        with_validators(response, etag, modified)
+    return response, status
+
+def list_products():
+    args = request.args
+    try:
+        filters = parse_filters(args)
+        fields = parse_fields(args["fields"]) if "fields" in args else None
+        paged = "limit" in args or "offset" in args
+        if paged:
+            limit = parse_int(args.get("limit", DEFAULT_LIMIT), "limit", 1, MAX_LIMIT)
+            offset = parse_int(args.get("offset", 0), "offset")
+        order = parse_sort(args["sort"]) if "sort" in args else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    matching = facet_index.filter(**filters) if filters else None
+    query = args.get("q", "")
+    ids = None
+    if query.strip():
+        # Ranked by relevance; an explicit sort= below takes precedence.
+        ids = search_index.search(query)
+        if matching is not None:
+            ids = [product_id for product_id in ids if product_id in matching]
+    elif matching is not None:
+        ids = sorted(matching)
+
+    if paged and ids is None:
+        # The whole catalog: read only the page (one LIMIT/OFFSET query on SQLite).
+        items, total = products_store.page(offset, limit, *(order or ()))
+        page = page_of([present(p, fields) for p in items], total, limit, offset)
+        page["facets"] = facet_index.counts(None)
+        return jsonify(page), 200
+    if paged and order is None:
+        # Ranked or filtered ids are already in order: fetch just the page's rows.
+        shown = ids[offset:offset + limit]
+        found = products_store.get_many(shown)
+        page = page_of([present(found[i], fields) for i in shown if i in found], len(ids), limit, offset)
+        page["facets"] = facet_index.counts(set(ids))
+        return jsonify(page), 200
+
+    if ids is None:
+        products = list(products_store.load())
+    else:
+        found = products_store.get_many(ids)
+        products = [found[i] for i in ids if i in found]
+    if order is not None:
+        products = sort_products(products, order)
+
+    # Without limit/offset the response stays a plain list, as before.
+    if paged:
+        page = paginate(products, limit, offset)
+        page["items"] = [present(p, fields) for p in page["items"]]
+        page["facets"] = facet_index.counts(set(ids))
+        return jsonify(page), 200
+    return jsonify([present(p, fields) for p in products]), 200
+
+@products_bp.route("/products/top", methods=["GET"])
+def get_top_products():
+    etag, modified = product_revisions.catalog()
+    response = not_modified(etag, modified)
+    if response is not None:
+        return response
+
+    response, status = listing_cache.respond(etag, top_products)
+    if status == 200:
+        with_validators(response, etag, modified)
+    return response, status
+
+def top_products():
+    """Best sellers or top rated, overall or in one brand, from the ranking index."""
+    args = request.args
+    by = args.get("by", "sold")
+    brand = args.get("brand", "").strip() or None
+    try:
+        if by not in RANKINGS:
+            raise ValueError(f"by must be one of {', '.join(RANKINGS)}")
+        k = parse_int(args.get("k", DEFAULT_K), "k", 1, MAX_K)
+        fields = parse_fields(args["fields"]) if "fields" in args else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    ids = ranking_index.top(by, k, brand)
+    found = products_store.get_many(ids)
+    products = []
+    for product_id in ids:
+        if product_id in found:
+            product = dict(found[product_id])
+            product["rating"] = calculate_product_rating(product)
+            product.setdefault("sold", 0)
+            products.append(project(product, fields) if fields else product)
+    return jsonify({"by": by, "brand": brand, "k": k, "items": products}), 200
 
 @products_bp.route("/products/<int:product_id>", methods=["GET"])
 def get_product(product_id):
+    etag, modified = product_revisions.row(product_id)
+    response = not_modified(etag, modified)
+    if response is not None:
+        return response
+
     product = find_product(product_id)
     if not product:
         return jsonify({"error": "Product not found"}), 404
     
+    product = dict(product)
     product["rating"] = calculate_product_rating(product)
     if "sold" not in product:
         product["sold"] = 0
-    return jsonify(product), 200
+    # Reviews live in their own store: a summary and the newest few here,
+    # the rest via /products/<id>/reviews.
+    reviews, next_cursor, total = review_index.page(product_id, PREVIEW_REVIEWS)
+    product["review_count"] = total
+    product["rating_stars"] = review_index.stars(product_id)
+    product["reviews"] = reviews
+    product["reviews_next_cursor"] = next_cursor
+    return with_validators(jsonify(product), etag, modified), 200
+
+@products_bp.route("/products/<int:product_id>/reviews", methods=["GET"])
+def get_reviews(product_id):
+    # A new review also updates the product's rating, so the product's
+    # revision covers its reviews too.
+    etag, modified = product_revisions.row(product_id)
+    response = not_modified(etag, modified)
+    if response is not None:
+        return response
+
+    if not find_product(product_id):
+        return jsonify({"error": "Product not found"}), 404
+
+    args = request.args
+    sort = args.get("sort", "newest")
+    try:
+        if sort not in REVIEW_SORTS:
+            raise ValueError(f"sort must be one of {', '.join(REVIEW_SORTS)}")
+        limit = parse_int(args.get("limit", REVIEWS_LIMIT), "limit", 1, MAX_REVIEWS_LIMIT)
+        cursor = decode_cursor(args["cursor"], sort) if args.get("cursor") else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    reviews, next_cursor, total = review_index.page(product_id, limit, cursor, sort)
+    return with_validators(jsonify({
+        "total": total,
+        "limit": limit,
+        "sort": sort,
+        "next_cursor": next_cursor,
+        "items": reviews,
+    }), etag, modified), 200
 
 @products_bp.route("/admin/products", methods=["POST"])
 def add_product():
     data = request.get_json()
-    required = ["title", "description", "price", "brand"]
-    
-    for field in required:
+    if not isinstance(data, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+    for field in REQUIRED_FIELDS:
         if not data.get(field):
             return jsonify({"error": f"{field} is required"}), 400
+    # Sorting and the facet indexes compare these values, so they must have the right types.
+    error = validate_fields(data)
+    if error:
+        return jsonify({"error": error}), 400
 
-    products = load_json(PRODUCTS_FILE)
-    new_product = {
-        "id": len(products) + 1,
-        "title": data["title"],
-        "description": data["description"],
-        "price": data["price"],
-        "brand": data["brand"],
-        "discountPercentage": data.get("discountPercentage", 0),
-        "rating": data.get("rating", 5),
-        "stock": data.get("stock", 50),
-        "weight": data.get("weight", 2),
-        "dimensions": data.get("dimensions", {"width": 0, "height": 0, "depth": 0}),
-        "warrantyInformation": data.get("warrantyInformation", "1 year warranty"),
-        "shippingInformation": data.get("shippingInformation", "Ships in 1 week"),
-        "availabilityStatus": data.get("availabilityStatus", "In Stock"),
-        "reviews": [],
-        "images": data.get("images", []),
-        "thumbnail": data.get("thumbnail", ""),
-        "stars": data.get("stars", 5),
-        "sold": 0
-    }
-    products.append(new_product)
-    save_json(PRODUCTS_FILE, products)
+    new_product = build_product(data, product_ids.allocate())
+    products_store.put(new_product)
     return jsonify({"message": "Product added", "product": new_product}), 201
 
+@products_bp.route("/admin/products/bulk", methods=["POST"])
+def bulk_products():
+    """Upsert/delete products from an NDJSON body, one product per line.
+
+    Lines are applied in batches as they are read; bad lines are reported
+    by line number and skipped.
+    """
+    result = BulkImport().feed(request.stream).report()
+    return jsonify(result), 200
+
+@products_bp.route("/admin/products/export", methods=["GET"])
+def export_products():
+    """The whole catalog as NDJSON, streamed batch by batch."""
+    return Response(export_lines(), mimetype="application/x-ndjson"), 200
+
 @products_bp.route("/admin/products/<int:product_id>", methods=["PUT"])
 def update_product(product_id):
-    products = load_json(PRODUCTS_FILE)
-    product = next((p for p in products if p["id"] == product_id), None)
-    
-    if not product:
-        return jsonify({"error": "Product not found"}), 404
-
     data = request.get_json()
-    
+    if not isinstance(data, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
     allowed = ["title", "description", "price", "brand", "stock", "discountPercentage", "images", "thumbnail"]
-    for field in allowed:
-        if field in data:
-            product[field] = data[field]
-    
-    save_json(PRODUCTS_FILE, products)
+    changes = {field: data[field] for field in allowed if field in data}
+    error = validate_fields(changes)
+    if error:
+        return jsonify({"error": error}), 400
+
+    with product_locks.hold([product_id]):
+        product = find_product(product_id)
+        
+        if not product:
+            return jsonify({"error": "Product not found"}), 404
+        
+        product = dict(product, **changes)
+        products_store.put(product)
     return jsonify({"message": "Product updated", "product": product}), 200
 
 @products_bp.route("/admin/products/<int:product_id>", methods=["DELETE"])
 def delete_product(product_id):
-    products = load_json(PRODUCTS_FILE)
-    products = [p for p in products if p["id"] != product_id]
-    save_json(PRODUCTS_FILE, products)
+    with product_locks.hold([product_id]), storage_transaction():
+        products_store.delete(product_id)
+        delete_product_reviews([product_id])
     return jsonify({"message": "Product deleted"}), 200
 
 @products_bp.route("/products/<int:product_id>/review", methods=["POST"])
@@ -101,23 +251,29 @@ def add_review(product_id):
     if not username or not comment:
         return jsonify({"error": "Username and comment required"}), 400
 
-    products = load_json(PRODUCTS_FILE)
-    product = find_product(product_id)
-    
-    if not product:
-        return jsonify({"error": "Product not found"}), 404
+    if isinstance(rating, bool) or not isinstance(rating, (int, float)) or not 1 <= rating <= 5:
+        return jsonify({"error": "Rating must be a number from 1 to 5"}), 400
 
-    product.setdefault("reviews", []).append({
-        "rating": rating,
-        "comment": comment,
-        "date": datetime.now().isoformat(),
-        "reviewerName": username
-    })
-    
-    for i, p in enumerate(products):
-        if p["id"] == product_id:
-            products[i] = product
-            break
-    
-    save_json(PRODUCTS_FILE, products)
+    with product_locks.hold([product_id]):
+        product = find_product(product_id)
+        
+        if not product:
+            return jsonify({"error": "Product not found"}), 404
+
+        # Rate a copy: the cached row only changes once the transaction stores it.
+        product = dict(product)
+        add_rating(product, rating)
+        review = {
+            "review_id": review_ids.allocate(),
+            "product_id": product_id,
+            "rating": rating,
+            "comment": comment,
+            "date": datetime.now().isoformat(),
+            "reviewerName": username
+        }
+
+        # Appends the review and rewrites only the product's fixed-size aggregate.
+        with storage_transaction():
+            reviews_store.put(review)
+            products_store.put(product)
     return jsonify({"message": "Review added"}), 201
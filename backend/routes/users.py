@@ -1,7 +1,8 @@
 from flask import Blueprint, request, jsonify
+from ..history import order_history, RECENT_ORDERS
+from ..locks import user_locks
 from ..utils import (
-    load_json, save_json, validate_age, user_exists, find_user,
-    USERS_FILE, ORDERS_FILE
+    validate_age, user_exists, find_user, users_store
 )
 from datetime import datetime
 
@@ -33,8 +34,7 @@ def register():
     if user_exists(username):
         return jsonify({"error": "Username already exists"}), 400
 
-    users = load_json(USERS_FILE)
-    users.append({
+    users_store.put({
         "username": username,
         "password": password,
         "name": name,
@@ -42,7 +42,6 @@ def register():
         "gender": gender.lower(),
         "birthday": birthday
     })
-    save_json(USERS_FILE, users)
     return jsonify({"message": "Registration successful"}), 201
 
 @users_bp.route("/login", methods=["POST"])
@@ -66,8 +65,8 @@ def get_user(username):
     if not user:
         return jsonify({"error": "User not found"}), 404
 
-    orders = load_json(ORDERS_FILE)
-    user_orders = [o for o in orders if o["username"] == username]
+    # Only the latest orders; the rest is paged through /orders/<username>?cursor=
+    recent, next_cursor, order_count = order_history.page(username, RECENT_ORDERS)
 
     return jsonify({
         "username": user["username"],
@@ -75,7 +74,9 @@ def get_user(username):
         "surname": user["surname"],
         "gender": user["gender"],
         "birthday": user["birthday"],
-        "orders": user_orders
+        "orders": order_history.orders(recent),
+        "order_count": order_count,
+        "orders_next_cursor": next_cursor
     }), 200
 
 @users_bp.route("/user/<username>", methods=["PUT"])
@@ -86,20 +87,17 @@ def update_user(username):
 
     data = request.get_json()
     
-    if "password" in data:
-        user["password"] = data["password"]
-    if "surname" in data:
-        user["surname"] = data["surname"]
+    if "gender" in data and data["gender"].lower() not in ["male", "female"]:
+        return jsonify({"error": "Gender must be male or female"}), 400
+
+    changes = {field: data[field] for field in ("password", "surname") if field in data}
     if "gender" in data:
-        if data["gender"].lower() not in ["male", "female"]:
-            return jsonify({"error": "Gender must be male or female"}), 400
-        user["gender"] = data["gender"].lower()
-
-    users = load_json(USERS_FILE)
-    for i, u in enumerate(users):
-        if u["username"] == username:
-            users[i] = user
-            break
-    save_json(USERS_FILE, users)
+        changes["gender"] = data["gender"].lower()
+
+    with user_locks.hold([username]):
+        user = find_user(username)
+        if not user:
+            return jsonify({"error": "User not found"}), 404
+        users_store.put(dict(user, **changes))
     
     return jsonify({"message": "User updated successfully"}), 200
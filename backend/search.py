@@ -0,0 +1,108 @@
+import math
+import re
+from bisect import bisect_left, insort
+
+from .store import DerivedIndex
+
+TOKEN_RE = re.compile(r"[0-9a-z]+")
+
+# Field weights: a hit in the title counts for more than one in the description.
+FIELDS = {"title": 3.0, "brand": 2.0, "category": 1.0, "description": 1.0}
+
+# BM25 parameters.
+K1 = 1.2
+B = 0.75
+
+# Score factor for a term reached only by prefix expansion ("viv" -> "vivobook").
+PREFIX_WEIGHT = 0.8
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(str(text).lower())
+
+
+class SearchIndex(DerivedIndex):
+    """Inverted index over the product catalog with prefix matching and BM25 ranking.
+
+    The index subscribes to the products dataset and updates the postings of
+    a single product on every put/delete, so admin edits and new reviews
+    never trigger a full rebuild. A reload of the whole dataset marks the
+    index stale and it is rebuilt on the next search.
+    """
+
+    def __init__(self, dataset):
+        self.reset()
+        super().__init__(dataset)
+
+    def reset(self):
+        self._postings = {}   # term -> {product id: weighted term frequency}
+        self._doc_terms = {}  # product id -> {term: weighted term frequency}
+        self._doc_length = {}
+        self._total_length = 0.0
+        self._terms = []      # sorted vocabulary, for prefix lookups
+
+    def add(self, product):
+        doc_id = product[self.dataset.key]
+        terms = {}
+        for field, weight in FIELDS.items():
+            for token in tokenize(product.get(field, "")):
+                terms[token] = terms.get(token, 0.0) + weight
+        length = sum(terms.values())
+        self._doc_terms[doc_id] = terms
+        self._doc_length[doc_id] = length
+        self._total_length += length
+        for term, tf in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                insort(self._terms, term)
+            postings[doc_id] = tf
+
+    def discard(self, doc_id):
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        self._total_length -= self._doc_length.pop(doc_id)
+        for term in terms:
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+                del self._terms[bisect_left(self._terms, term)]
+
+    def _expand(self, token):
+        """Vocabulary terms starting with `token`, with the weight each one scores at."""
+        expanded = {}
+        i = bisect_left(self._terms, token)
+        while i < len(self._terms) and self._terms[i].startswith(token):
+            term = self._terms[i]
+            expanded[term] = 1.0 if term == token else PREFIX_WEIGHT
+            i += 1
+        return expanded
+
+    def search(self, query):
+        """Product ids matching every word of `query`, best match first."""
+        with self.synced():
+            tokens = tokenize(query)
+            if not tokens or not self._doc_terms:
+                return []
+            n = len(self._doc_terms)
+            avg_length = self._total_length / n
+            scores = None
+            for token in tokens:
+                token_scores = {}
+                for term, weight in self._expand(token).items():
+                    postings = self._postings[term]
+                    idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for doc_id, tf in postings.items():
+                        norm = K1 * (1 - B + B * self._doc_length[doc_id] / avg_length)
+                        score = weight * idf * tf * (K1 + 1) / (tf + norm)
+                        if score > token_scores.get(doc_id, 0.0):
+                            token_scores[doc_id] = score
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {d: s + token_scores[d] for d, s in scores.items() if d in token_scores}
+                if not scores:
+                    return []
+            return sorted(scores, key=lambda d: (-scores[d], d))
@@ -0,0 +1,282 @@
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping, Sequence
+from functools import lru_cache
+
+from . import metrics
+from .records import json_default
+from .store import Dataset
+
+# Snapshot file layout, in native byte order (the magic records which):
+#   header   magic, source mtime_ns, source size, row count, max key
+#   keys     int64 x count, sorted
+#   rows     int64 x count, position in the file of the row with that key
+#   offsets  uint64 x count, where each row's record starts, in file order
+#   records  uint32 length + the row as compact JSON, one per row
+MAGIC = b"SHOPSNP" + (b"L" if sys.byteorder == "little" else b"B")
+HEADER = struct.Struct("=8sqqQq")
+LENGTH = struct.Struct("=I")
+WORD = 8
+# Rows looked up by position or key that stay decoded, most recently used first.
+CACHED_ROWS = 1024
+
+
+def snapshot_path(path):
+    return f"{path}.snap"
+
+
+def write_snapshot(path, rows, key, signature):
+    """Write the snapshot of `rows` for a source file with `signature` (mtime_ns, size).
+
+    Only datasets with unique integer keys get a snapshot; returns False
+    (and writes nothing) for any other. An empty dataset doesn't show its
+    key type, and parses instantly anyway, so it gets none either.
+    """
+    if not rows:
+        return False
+    keys = []
+    for row in rows:
+        value = row.get(key) if isinstance(row, Mapping) else None
+        if not isinstance(value, int) or isinstance(value, bool):
+            return False
+        keys.append(value)
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+    sorted_keys = array("q", [keys[i] for i in order])
+    if any(a == b for a, b in zip(sorted_keys, sorted_keys[1:])):
+        return False
+
+    # Records are streamed after the index; the offsets are filled in at the end.
+    count = len(keys)
+    offsets = array("Q", [0] * count)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, signature[0], signature[1], count, max(keys, default=0)))
+        f.write(sorted_keys.tobytes())
+        f.write(array("q", order).tobytes())
+        offsets_at = f.tell()
+        f.write(offsets.tobytes())
+        for i, row in enumerate(rows):
+            record = json.dumps(row, separators=(",", ":"), default=json_default).encode()
+            offsets[i] = f.tell()
+            f.write(LENGTH.pack(len(record)))
+            f.write(record)
+        f.seek(offsets_at)
+        f.write(offsets.tobytes())
+    os.replace(tmp_path, path)
+    return True
+
+
+class Snapshot:
+    """A snapshot file mapped into memory; rows are decoded on request.
+
+    The key, position and offset arrays are views straight into the
+    mapping, so opening a snapshot reads and copies nothing but the header,
+    and the pages are shared with every other process mapping the file.
+    """
+
+    def __init__(self, mapping, count, max_key):
+        self._mapping = mapping
+        self.count = count
+        self.max_key = max_key
+        view = memoryview(mapping)
+        start = HEADER.size
+        self.keys = view[start:start + count * WORD].cast("q")
+        start += count * WORD
+        self.positions = view[start:start + count * WORD].cast("q")
+        start += count * WORD
+        self.offsets = view[start:start + count * WORD].cast("Q")
+        self.index_size = start + count * WORD
+
+    @classmethod
+    def open(cls, path, signature):
+        """The snapshot at `path` if it was built from a source with `signature`, else None."""
+        if signature is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):  # missing, unreadable or empty
+            return None
+        if len(mapping) < HEADER.size:
+            return None
+        magic, mtime_ns, size, count, max_key = HEADER.unpack_from(mapping)
+        if magic != MAGIC or (mtime_ns, size) != signature or len(mapping) < HEADER.size + 3 * count * WORD:
+            return None
+        return cls(mapping, count, max_key)
+
+    def find(self, key):
+        """Position in the file of the row with `key`, or None."""
+        if not isinstance(key, int):
+            return None
+        i = bisect_left(self.keys, key)
+        if i < self.count and self.keys[i] == key:
+            return self.positions[i]
+        return None
+
+    def decode(self, position):
+        offset = self.offsets[position]
+        (length,) = LENGTH.unpack_from(self._mapping, offset)
+        start = offset + LENGTH.size
+        return json.loads(self._mapping[start:start + length])
+
+
+class LazyRows(Sequence):
+    """The rows of a snapshot in file order, decoded on access.
+
+    Only the last `cached` rows looked up by position (or key) stay decoded.
+    Iterating decodes one row at a time and keeps none, so a full listing
+    or an index build never holds the whole snapshot in memory. A row is
+    not shared with later lookups: change a copy and `put` it.
+    """
+
+    def __init__(self, snapshot, record=None, cached=CACHED_ROWS):
+        self._snapshot = snapshot
+        self._record = record
+        self._cached = lru_cache(maxsize=cached)(self._decode)
+
+    def _decode(self, position):
+        row = self._snapshot.decode(position)
+        return row if self._record is None else self._record(row)
+
+    def __len__(self):
+        return self._snapshot.count
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        return self._cached(range(len(self))[position])
+
+    def __iter__(self):
+        for position in range(len(self)):
+            yield self._decode(position)
+
+    def decoded(self):
+        """How many rows are held decoded."""
+        return self._cached.cache_info().currsize
+
+
+class LazyIndex(Mapping):
+    """Key -> row over a snapshot: a bisect in the mapped keys, then one decode."""
+
+    def __init__(self, snapshot, rows):
+        self._snapshot = snapshot
+        self._rows = rows
+
+    def __getitem__(self, key):
+        position = self._snapshot.find(key)
+        if position is None:
+            raise KeyError(key)
+        return self._rows[position]
+
+    def __contains__(self, key):
+        return self._snapshot.find(key) is not None
+
+    def __len__(self):
+        return self._snapshot.count
+
+    def __iter__(self):
+        return iter(self._snapshot.keys)
+
+
+class SnapshotDataset(Dataset):
+    """A JSON dataset that starts from a memory-mapped binary snapshot.
+
+    Next to the JSON file sits `<file>.snap`, stamped with the mtime and
+    size of the JSON it was built from. While they match, loading maps the
+    snapshot instead of parsing the JSON: startup costs the same whatever
+    the size of the file, and a row is only decoded when something asks
+    for it (`get` bisects the mapped keys). When the JSON has changed the
+    file is parsed as usual and the snapshot is rebuilt from it.
+
+    `select` scans the snapshot once per grouped field and keeps only the
+    positions of each group's rows. The first write decodes the remaining
+    rows and continues from ordinary in-memory indexes, so the JSON file
+    stays the source of truth and is written exactly as before.
+    """
+
+    def __init__(self, path, default=None, **options):
+        super().__init__(path, default, **options)
+        self.snapshot_path = snapshot_path(path)
+        self._lazy = False
+        self._positions = {}  # grouped field -> {value: positions of its rows}, while lazy
+
+    def _load_data(self):
+        if not os.path.exists(self.path):
+            self._write(self.default)
+        signature = self._stat()
+        started = time.perf_counter()
+        snapshot = Snapshot.open(self.snapshot_path, signature) if self.key is not None else None
+        if snapshot is None:
+            super()._load_data()
+            # Skip the rebuild if the file changed while it was being parsed.
+            if self.key is not None and self._stat() == signature:
+                self._write_snapshot(signature)
+            return
+        if metrics.enabled:
+            metrics.record_read(self.name, snapshot.index_size, time.perf_counter() - started)
+        rows = LazyRows(snapshot, self.record)
+        self._index = LazyIndex(snapshot, rows)
+        self._group_index = {field: {} for field in self.groups}
+        self._positions = {}
+        self._max_key = snapshot.max_key
+        self.data = rows
+        self._lazy = True
+
+    def build_snapshot(self):
+        """Bring the snapshot up to date with the JSON file; True if there is one."""
+        with self._lock, self._exclusive():
+            self.load()
+            # The snapshot must hold what the file holds.
+            self.flush()
+            signature = self._stat()
+            if Snapshot.open(self.snapshot_path, signature) is not None:
+                return True
+            return self._write_snapshot(signature)
+
+    def _write_snapshot(self, signature):
+        try:
+            if write_snapshot(self.snapshot_path, self.data, self.key, signature):
+                return True
+            # Not snapshotted (any more): don't leave an old snapshot around.
+            if os.path.exists(self.snapshot_path):
+                os.remove(self.snapshot_path)
+        except OSError:
+            # Only a cache: without it the next start parses the JSON again.
+            pass
+        return False
+
+    def _reindex(self, data):
+        self._lazy = False
+        self._positions = {}
+        super()._reindex(data)
+
+    def _materialize(self):
+        if self._lazy:
+            rows = list(self.data)
+            self._reindex(rows)
+            self.data = rows
+
+    def _before_write(self):
+        self._materialize()
+
+    def select(self, field, value):
+        self.load()
+        with self._lock:
+            self.load()
+            if not self._lazy:
+                return super().select(field, value)
+            if field not in self.groups:
+                raise KeyError(field)
+            groups = self._positions.get(field)
+            if groups is None:
+                groups = self._positions[field] = {}
+                for position, row in enumerate(self.data):
+                    groups.setdefault(row.get(field), array("q")).append(position)
+            rows = self.data
+        return [rows[position] for position in groups.get(value, ())]
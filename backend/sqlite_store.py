@@ -0,0 +1,573 @@
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from . import metrics
+
+
+def sql_type(type_):
+    """Declared SQLite type of a column type.
+
+    `JSON` is stored as TEXT. `NUMBER` declares no type at all, so values
+    keep the storage class they were written with: `3` reads back as `3`
+    and `3.0` as `3.0`, where REAL would turn both into floats (and
+    NUMERIC both into integers).
+    """
+    return {"JSON": "TEXT", "NUMBER": ""}.get(type_, type_)
+
+
+class Table:
+    """Maps one JSON dataset onto an SQLite table.
+
+    `columns` is a list of `(field, column, type)` tuples. A dotted field such
+    as `dimensions.width` is stored flat and rebuilt as a nested dict. A type of
+    `JSON` stores the value as JSON text, and `NUMBER` stores prices, weights
+    and other numbers exactly as given, int or float. `children` maps list fields (cart
+    lines, order items) to child tables, given as `(field, Table)` pairs
+    whose rows carry the parent key in `parent_key`. Any field not covered by a
+    column is kept in an `extra` JSON column, so rows round-trip unchanged.
+    """
+
+    def __init__(self, name, key, columns, children=(), indexes=(),
+                 autoincrement=False, parent_key=None):
+        self.name = name
+        self.key = key
+        self.columns = columns
+        self.children = list(children)
+        self.indexes = indexes
+        self.autoincrement = autoincrement
+        self.parent_key = parent_key
+        self.key_column = next((c for f, c, _ in columns if f == key), None)
+        self.fields = {f.split(".")[0] for f, _, _ in columns}
+        self.fields.update(field for field, _ in self.children)
+
+    def create_table(self, name):
+        defs = []
+        if self.parent_key:
+            defs.append(f"{self.parent_key} NOT NULL")
+            defs.append("position INTEGER NOT NULL")
+        for field, column, type_ in self.columns:
+            if field == self.key:
+                pk = "PRIMARY KEY AUTOINCREMENT" if self.autoincrement else "PRIMARY KEY"
+                defs.append(f"{column} {sql_type(type_)} {pk}")
+            else:
+                defs.append(f"{column} {sql_type(type_)}".rstrip())
+        defs.append("extra TEXT")
+        if self.parent_key:
+            defs.append(f"PRIMARY KEY ({self.parent_key}, position)")
+        return f"CREATE TABLE IF NOT EXISTS {name} ({', '.join(defs)})"
+
+    def create_indexes(self):
+        return [
+            f"CREATE INDEX IF NOT EXISTS {self.name}_{column} ON {self.name} ({column})"
+            for column in self.indexes
+        ]
+
+    def encode(self, row):
+        values = []
+        for field, _, type_ in self.columns:
+            value = row
+            for part in field.split("."):
+                value = value.get(part) if isinstance(value, dict) else None
+            if type_ == "JSON" and value is not None:
+                value = json.dumps(value)
+            values.append(value)
+        extra = {k: v for k, v in row.items() if k not in self.fields}
+        values.append(json.dumps(extra) if extra else None)
+        return values
+
+    def decode(self, values):
+        row = {}
+        for (field, _, type_), value in zip(self.columns, values):
+            if value is None:
+                continue
+            if type_ == "JSON":
+                value = json.loads(value)
+            *parents, leaf = field.split(".")
+            target = row
+            for part in parents:
+                target = target.setdefault(part, {})
+            target[leaf] = value
+        if values[len(self.columns)]:
+            row.update(json.loads(values[len(self.columns)]))
+        return row
+
+    @property
+    def column_list(self):
+        return ", ".join([c for _, c, _ in self.columns] + ["extra"])
+
+
+class SqliteDatabase:
+    """One SQLite file in WAL mode with a connection per thread."""
+
+    def __init__(self, path, tables):
+        self.path = path
+        self.tables = tables
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    @property
+    def conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.depth = 0
+            self._local.after_commit = []
+            self._ensure_schema(conn)
+        return conn
+
+    def _ensure_schema(self, conn):
+        if self._schema_ready:
+            return
+        with self._schema_lock:
+            if self._schema_ready:
+                return
+            for table in self.tables:
+                family = [table] + [child for _, child in table.children]
+                for t in family:
+                    conn.execute(t.create_table(t.name))
+                self._add_missing_columns(conn, table)
+                self._retype_columns(conn, table)
+                # Last: an index may be on a column that was only just added.
+                for t in family:
+                    for statement in t.create_indexes():
+                        conn.execute(statement)
+            self._schema_ready = True
+
+    def _add_missing_columns(self, conn, table):
+        """Bring tables created by an older schema up to date."""
+        for t in [table] + [child for _, child in table.children]:
+            existing = {r[1] for r in conn.execute(f"PRAGMA table_info({t.name})")}
+            for _, column, type_ in t.columns:
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE {t.name} ADD COLUMN {column} {sql_type(type_)}")
+
+    @staticmethod
+    def _real_numbers(conn, t):
+        """The declared column types of `t` if a NUMBER column among them isn't one, else None."""
+        declared = {r[1]: r[2] for r in conn.execute(f"PRAGMA table_info({t.name})")}
+        if any(declared[column] != sql_type(type_) for _, column, type_ in t.columns if type_ == "NUMBER"):
+            return declared
+        return None
+
+    def _retype_columns(self, conn, table):
+        """Rebuild tables whose NUMBER columns an older schema created as REAL.
+
+        SQLite can't change a column's type in place, so the rows are copied
+        into a new table. Numbers already stored as floats stay floats;
+        `manage.py migrate-sqlite` writes them again from the JSON files.
+        """
+        for t in [table] + [child for _, child in table.children]:
+            if not self._real_numbers(conn, t):
+                continue
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Another process may have rebuilt it in the meantime.
+                declared = self._real_numbers(conn, t)
+                if not declared:
+                    conn.execute("COMMIT")
+                    continue
+                seq = conn.execute(
+                    "SELECT seq FROM sqlite_sequence WHERE name = ?", (t.name,)
+                ).fetchone() if t.autoincrement else None
+                wanted = {c for _, c, _ in t.columns} | {"extra", "position", t.parent_key}
+                columns = ", ".join(c for c in declared if c in wanted)
+                for column in t.indexes:
+                    conn.execute(f"DROP INDEX IF EXISTS {t.name}_{column}")
+                conn.execute(t.create_table(f"{t.name}_retyped"))
+                conn.execute(
+                    f"INSERT INTO {t.name}_retyped ({columns}) SELECT {columns} FROM {t.name}"
+                )
+                conn.execute(f"DROP TABLE {t.name}")
+                conn.execute(f"ALTER TABLE {t.name}_retyped RENAME TO {t.name}")
+                if seq is not None:
+                    # Keys of rows deleted at the end are still never reused.
+                    conn.execute("DELETE FROM sqlite_sequence WHERE name = ?", (t.name,))
+                    conn.execute(
+                        "INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (t.name, seq[0])
+                    )
+                for statement in t.create_indexes():
+                    conn.execute(statement)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    @contextmanager
+    def transaction(self):
+        """BEGIN IMMEDIATE ... COMMIT; nested calls join the outer transaction."""
+        conn = self.conn
+        if self._local.depth == 0:
+            conn.execute("BEGIN IMMEDIATE")
+        self._local.depth += 1
+        try:
+            yield conn
+        except BaseException:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                conn.execute("ROLLBACK")
+                self._local.after_commit.clear()
+            raise
+        self._local.depth -= 1
+        if self._local.depth == 0:
+            conn.execute("COMMIT")
+            callbacks, self._local.after_commit = self._local.after_commit, []
+            for callback in callbacks:
+                callback()
+
+    def after_commit(self, callback):
+        """Run `callback` once the current outermost transaction has committed."""
+        if self._local.depth == 0:
+            callback()
+        else:
+            self._local.after_commit.append(callback)
+
+
+class SqliteDataset:
+    """Dataset interface (see `store.Dataset`) backed by an SQLite table.
+
+    Nothing is cached: every call is an indexed query, and every mutation is
+    a transaction touching only the affected rows. SQLite already serializes
+    writers across processes; a `coordinator` only tells the in-memory
+    indexes of other workers (through `revalidate`) that they are stale.
+    """
+
+    def __init__(self, db, table, groups=(), coordinator=None):
+        self.db = db
+        self.table = table
+        self.key = table.key
+        self.groups = tuple(groups)
+        self.coordinator = coordinator
+        self._seen = coordinator.version() if coordinator is not None else 0
+        self._listeners = []
+
+    def load(self):
+        if metrics.enabled:
+            metrics.record_call(self.table.name, "load")
+        conn = self.db.conn
+        rows = conn.execute(
+            f"SELECT {self.table.column_list} FROM {self.table.name} "
+            f"ORDER BY {self.table.key_column}"
+        ).fetchall()
+        return self._assemble(rows, None)
+
+    def save(self, data):
+        if metrics.enabled:
+            metrics.record_call(self.table.name, "save")
+        with self.db.transaction() as conn:
+            conn.execute(f"DELETE FROM {self.table.name}")
+            for _, child in self.table.children:
+                conn.execute(f"DELETE FROM {child.name}")
+            for row in data:
+                self._insert(conn, row)
+            self._committed("reload", None)
+
+    def revalidate(self):
+        if self.coordinator is None:
+            return
+        version = self.coordinator.version()
+        if version != self._seen:
+            self._seen = version
+            self._notify("reload", None)
+
+    def version(self):
+        """The shared counter as of the last change this worker knows about."""
+        return self._seen
+
+    def _committed(self, event, rows):
+        """Once the current transaction commits, bump the shared counter and notify listeners.
+
+        On a rollback neither happens, so no index ever sees rows that were not stored.
+        """
+        self.db.after_commit(self._changed)
+        self.db.after_commit(lambda: self._notify(event, rows))
+
+    def _changed(self):
+        if self.coordinator is None:
+            return
+        version = self.coordinator.bump()
+        if version != self._seen + 1:
+            # Another worker committed since we last looked.
+            self._seen = version
+            self._notify("reload", None)
+        else:
+            self._seen = version
+
+    def invalidate(self):
+        pass
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def _notify(self, event, rows):
+        for listener in self._listeners:
+            listener(event, rows)
+
+    def get(self, key):
+        if metrics.enabled:
+            metrics.record_call(self.table.name, "load")
+        rows = self.db.conn.execute(
+            f"SELECT {self.table.column_list} FROM {self.table.name} "
+            f"WHERE {self.table.key_column} = ?", (key,)
+        ).fetchall()
+        found = self._assemble(rows, [key])
+        return found[0] if found else None
+
+    def get_many(self, keys):
+        if metrics.enabled:
+            metrics.record_call(self.table.name, "load")
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        rows = self.db.conn.execute(
+            f"SELECT {self.table.column_list} FROM {self.table.name} "
+            f"WHERE {self.table.key_column} IN ({', '.join('?' * len(keys))})", keys
+        ).fetchall()
+        return {row[self.key]: row for row in self._assemble(rows, keys)}
+
+    def select(self, field, value):
+        if metrics.enabled:
+            metrics.record_call(self.table.name, "load")
+        column = next(c for f, c, _ in self.table.columns if f == field)
+        rows = self.db.conn.execute(
+            f"SELECT {self.table.column_list} FROM {self.table.name} "
+            f"WHERE {column} = ? ORDER BY {self.table.key_column}", (value,)
+        ).fetchall()
+        return self._assemble(rows, [r[self._key_position] for r in rows])
+
+    def page(self, offset, limit, order_by=None, descending=False, missing=None):
+        """One LIMIT/OFFSET query for the page, and a COUNT for the total.
+
+        Ordered by key, or by `order_by` with rows lacking it sorting as
+        `missing` and ties in key order, as `store.Dataset.page` orders them.
+        """
+        if metrics.enabled:
+            metrics.record_call(self.table.name, "load")
+        order, params = self.table.key_column, (limit, offset)
+        if order_by is not None:
+            column = next((c for f, c, _ in self.table.columns if f == order_by), None)
+            if column is None:
+                # Only in the `extra` JSON: sort in Python.
+                rows = sorted(self.load(), key=lambda row: row.get(order_by, missing), reverse=descending)
+                return rows[offset:offset + limit], len(rows)
+            direction = "DESC" if descending else "ASC"
+            order = f"COALESCE({column}, ?) {direction}, {self.table.key_column}"
+            params = (missing, limit, offset)
+        conn = self.db.conn
+        rows = conn.execute(
+            f"SELECT {self.table.column_list} FROM {self.table.name} "
+            f"ORDER BY {order} LIMIT ? OFFSET ?", params
+        ).fetchall()
+        (total,) = conn.execute(f"SELECT COUNT(*) FROM {self.table.name}").fetchone()
+        return self._assemble(rows, [r[self._key_position] for r in rows]), total
+
+    def next_key(self):
+        conn = self.db.conn
+        seq = None
+        if self.table.autoincrement:
+            seq = conn.execute(
+                "SELECT seq FROM sqlite_sequence WHERE name = ?", (self.table.name,)
+            ).fetchone()
+        if seq is None:
+            seq = conn.execute(
+                f"SELECT MAX({self.table.key_column}) FROM {self.table.name}"
+            ).fetchone()
+        return (seq[0] or 0) + 1
+
+    def put(self, row):
+        return self.put_many([row])[0]
+
+    def put_many(self, rows):
+        if metrics.enabled:
+            metrics.record_call(self.table.name, "save")
+        with self.db.transaction() as conn:
+            for row in rows:
+                self._delete(conn, row[self.key])
+                self._insert(conn, row)
+            self._committed("put", rows)
+        return rows
+
+    def delete(self, key):
+        removed = self.delete_many([key])
+        return removed[0] if removed else None
+
+    def delete_many(self, keys):
+        if metrics.enabled:
+            metrics.record_call(self.table.name, "save")
+        with self.db.transaction() as conn:
+            removed = list(self.get_many(keys).values())
+            for row in removed:
+                self._delete(conn, row[self.key])
+            if removed:
+                self._committed("delete", removed)
+        return removed
+
+    def scan(self, batch_size=500):
+        """All rows in batches of `batch_size`, one keyset-paged query per batch."""
+        last = None
+        while True:
+            where, params = "", (batch_size,)
+            if last is not None:
+                where, params = f"WHERE {self.table.key_column} > ?", (last, batch_size)
+            rows = self.db.conn.execute(
+                f"SELECT {self.table.column_list} FROM {self.table.name} {where} "
+                f"ORDER BY {self.table.key_column} LIMIT ?", params
+            ).fetchall()
+            if not rows:
+                return
+            keys = [r[self._key_position] for r in rows]
+            yield self._assemble(rows, keys)
+            last = keys[-1]
+
+    @property
+    def _key_position(self):
+        return [f for f, _, _ in self.table.columns].index(self.key)
+
+    def _assemble(self, rows, keys):
+        result = [self.table.decode(r) for r in rows]
+        if not self.table.children or not result:
+            return result
+        by_key = {row[self.key]: row for row in result}
+        for field, child in self.table.children:
+            for row in result:
+                row[field] = []
+            where, params = "", ()
+            if keys is not None:
+                where = f"WHERE {child.parent_key} IN ({', '.join('?' * len(keys))})"
+                params = tuple(keys)
+            for values in self.db.conn.execute(
+                f"SELECT {child.parent_key}, {child.column_list} FROM {child.name} "
+                f"{where} ORDER BY {child.parent_key}, position", params
+            ):
+                parent = by_key.get(values[0])
+                if parent is not None:
+                    parent[field].append(child.decode(values[1:]))
+        return result
+
+    def _insert(self, conn, row):
+        values = self.table.encode(row)
+        conn.execute(
+            f"INSERT INTO {self.table.name} ({self.table.column_list}) "
+            f"VALUES ({', '.join('?' * len(values))})", values
+        )
+        for field, child in self.table.children:
+            lines = [
+                [row[self.key], position] + child.encode(item)
+                for position, item in enumerate(row.get(field, []))
+            ]
+            if lines:
+                conn.executemany(
+                    f"INSERT INTO {child.name} ({child.parent_key}, position, {child.column_list}) "
+                    f"VALUES ({', '.join('?' * len(lines[0]))})", lines
+                )
+
+    def _delete(self, conn, key):
+        conn.execute(
+            f"DELETE FROM {self.table.name} WHERE {self.table.key_column} = ?", (key,)
+        )
+        for _, child in self.table.children:
+            conn.execute(f"DELETE FROM {child.name} WHERE {child.parent_key} = ?", (key,))
+
+
+USERS_TABLE = Table("users", "username", [
+    ("username", "username", "TEXT"),
+    ("password", "password", "TEXT"),
+    ("name", "name", "TEXT"),
+    ("surname", "surname", "TEXT"),
+    ("gender", "gender", "TEXT"),
+    ("birthday", "birthday", "TEXT"),
+])
+
+PRODUCTS_TABLE = Table("products", "id", [
+    ("id", "id", "INTEGER"),
+    ("title", "title", "TEXT"),
+    ("description", "description", "TEXT"),
+    ("price", "price", "NUMBER"),
+    ("discountPercentage", "discount_percentage", "NUMBER"),
+    ("rating", "rating", "NUMBER"),
+    ("stock", "stock", "INTEGER"),
+    ("brand", "brand", "TEXT"),
+    ("category", "category", "TEXT"),
+    ("weight", "weight", "NUMBER"),
+    ("dimensions.width", "width", "NUMBER"),
+    ("dimensions.height", "height", "NUMBER"),
+    ("dimensions.depth", "depth", "NUMBER"),
+    ("warrantyInformation", "warranty_information", "TEXT"),
+    ("shippingInformation", "shipping_information", "TEXT"),
+    ("availabilityStatus", "availability_status", "TEXT"),
+    ("images", "images", "JSON"),
+    ("thumbnail", "thumbnail", "TEXT"),
+    ("stars", "stars", "NUMBER"),
+    ("sold", "sold", "INTEGER"),
+    ("review_count", "review_count", "INTEGER"),
+    ("rating_sum", "rating_sum", "NUMBER"),
+], indexes=["brand"], autoincrement=True)
+
+# Before reviews had a table of their own they were a child table of
+# products named `reviews`; `manage.py migrate-reviews` moves those rows.
+REVIEWS_TABLE = Table("product_reviews", "review_id", [
+    ("review_id", "review_id", "INTEGER"),
+    ("product_id", "product_id", "INTEGER"),
+    ("rating", "rating", "NUMBER"),
+    ("comment", "comment", "TEXT"),
+    ("date", "date", "TEXT"),
+    ("reviewerName", "reviewer_name", "TEXT"),
+], indexes=["product_id"], autoincrement=True)
+
+SALES_TABLE = Table("sales_rollups", "key", [
+    ("key", "key", "TEXT"),
+    ("day", "day", "TEXT"),
+    ("dimension", "dimension", "TEXT"),
+    ("value", "value", "TEXT"),
+    ("label", "label", "TEXT"),
+    ("units", "units", "INTEGER"),
+    ("revenue", "revenue", "NUMBER"),
+    ("orders", "orders", "INTEGER"),
+], indexes=["day"])
+
+CARTS_TABLE = Table("carts", "username", [
+    ("username", "username", "TEXT"),
+], children=[
+    ("cart", Table("cart_items", None, [
+        ("product_id", "product_id", "INTEGER"),
+        ("quantity", "quantity", "INTEGER"),
+    ], parent_key="username", indexes=["product_id"])),
+])
+
+ORDERS_TABLE = Table("orders", "order_id", [
+    ("order_id", "order_id", "INTEGER"),
+    ("username", "username", "TEXT"),
+    ("date", "date", "TEXT"),
+    ("total_price", "total_price", "NUMBER"),
+], children=[
+    ("items", Table("order_items", None, [
+        ("product_id", "product_id", "INTEGER"),
+        ("title", "title", "TEXT"),
+        ("quantity", "quantity", "INTEGER"),
+        ("price", "price", "NUMBER"),
+        ("discountPercentage", "discount_percentage", "NUMBER"),
+        ("unit_price", "unit_price", "NUMBER"),
+        ("subtotal", "subtotal", "NUMBER"),
+    ], parent_key="order_id", indexes=["product_id"])),
+], indexes=["username", "date"], autoincrement=True)
+
+TABLES = [USERS_TABLE, PRODUCTS_TABLE, REVIEWS_TABLE, CARTS_TABLE, ORDERS_TABLE, SALES_TABLE]
+
+_databases = {}
+_databases_lock = threading.Lock()
+
+
+def get_database(path):
+    with _databases_lock:
+        if path not in _databases:
+            _databases[path] = SqliteDatabase(path, TABLES)
+        return _databases[path]
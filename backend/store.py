@@ -0,0 +1,438 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+from . import metrics
+from .records import json_default
+from .write_behind import writing_through
+
+
+class Dataset:
+    """Parsed contents of one JSON data file, kept in memory between requests.
+
+    The cached copy is revalidated against the file's mtime and size, so edits
+    made outside the process are picked up, while writes made through this
+    object refresh the cache directly instead of forcing a re-parse.
+
+    Rows are indexed by `key` (unique) and by every field in `groups`
+    (non-unique). The indexes are built once per parse and kept up to date by
+    `put`/`put_many`/`delete`, so lookups stay O(1) as the file grows.
+
+    Derived structures (search, facets, ...) register with `subscribe` and are
+    told about every change as `listener(event, rows)`, where event is "put",
+    "delete" or "reload" (rows is None: rebuild from `load()`).
+
+    With a `coordinator` (see backend/coordination.py) several worker
+    processes can share the file: mutations run under its file lock on top
+    of freshly reloaded data, and its shared counter replaces the stat()
+    check as the signal that another worker changed the file.
+
+    With a `record` type (see backend/records.py) rows are kept as that
+    type instead of dicts: parsed and inserted rows are converted, and rows
+    updated in place stay records.
+
+    With a `write_behind` flusher (see backend/write_behind.py) mutations
+    only change memory and mark the dataset dirty; the flusher writes the
+    file later, once for many changes, unless the caller is inside
+    `sync_writes()`. Until then the in-memory copy is kept as it is, even
+    if the file is changed by someone else.
+    """
+
+    def __init__(self, path, default=None, key=None, groups=(), coordinator=None, record=None,
+                 write_behind=None):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.default = [] if default is None else default
+        self.key = key
+        self.groups = tuple(groups)
+        self.coordinator = coordinator
+        self.record = record
+        self.write_behind = write_behind
+        self._dirty = False
+        self.data = None
+        self._signature = None
+        self._index = {}
+        self._group_index = {field: {} for field in self.groups}
+        self._max_key = 0
+        self._listeners = []
+        self._lock = threading.RLock()
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _current(self):
+        """Cheap token that changes whenever the persisted data changes."""
+        if self.coordinator is not None:
+            return self.coordinator.version()
+        return self._stat()
+
+    def _written(self):
+        """Token after a write of our own; also tells other workers about it."""
+        if self.coordinator is not None:
+            return self.coordinator.bump()
+        return self._stat()
+
+    def _exclusive(self):
+        if self.coordinator is not None:
+            return self.coordinator.lock
+        return nullcontext()
+
+    def load(self):
+        if metrics.enabled:
+            metrics.record_call(self.name, "load")
+        if self.data is not None and (self._dirty or self._current() == self._signature):
+            return self.data
+        with self._lock:
+            signature = self._current()
+            if self.data is not None and (self._dirty or signature == self._signature):
+                return self.data
+            self._load_data()
+            # A file created from the default has changed since the stat.
+            self._signature = signature if signature is not None else self._current()
+            self._notify("reload", None)
+            return self.data
+
+    def _load_data(self):
+        if not os.path.exists(self.path):
+            self._write(self.default)
+        with open(self.path, "rb") as f:
+            raw = f.read()
+        started = time.perf_counter()
+        data = self._records(json.loads(raw))
+        if metrics.enabled:
+            metrics.record_read(self.name, len(raw), time.perf_counter() - started)
+        self._reindex(data)
+        self.data = data
+
+    def save(self, data):
+        """Replace the whole dataset with `data` and persist it."""
+        if metrics.enabled:
+            metrics.record_call(self.name, "save")
+        data = self._records(data)
+        with self._lock, self._exclusive():
+            self._reindex(data)
+            self.data = data
+            self._persist()
+            self._notify("reload", None)
+
+    def revalidate(self):
+        """Pick up changes made outside this object (cheap when nothing changed)."""
+        self.load()
+
+    def version(self):
+        """Token of the data held now; with a coordinator, the shared counter it was at."""
+        return self._signature
+
+    def invalidate(self):
+        self.flush()
+        with self._lock:
+            self.data = None
+            self._signature = None
+
+    # Indexed access
+
+    def get(self, key):
+        self.load()
+        return self._index.get(key)
+
+    def get_many(self, keys):
+        """{key: row} for the given keys that exist, from one index pass."""
+        self.load()
+        index = self._index
+        return {key: index[key] for key in keys if key in index}
+
+    def select(self, field, value):
+        self.load()
+        return self._group_index[field].get(value, [])
+
+    def page(self, offset, limit, order_by=None, descending=False, missing=None):
+        """(`limit` rows from `offset`, total row count), in file order or by `order_by`.
+
+        Rows without `order_by` sort as `missing`; ties keep file order.
+        """
+        rows = self.load()
+        if order_by is not None:
+            rows = sorted(rows, key=lambda row: row.get(order_by, missing), reverse=descending)
+        return rows[offset:offset + limit], len(rows)
+
+    def next_key(self):
+        """Next free integer key; never reuses the key of a deleted row."""
+        self.load()
+        return self._max_key + 1
+
+    # Mutations
+
+    def put(self, row):
+        """Insert `row`, or persist it after it was changed in place."""
+        return self.put_many([row])[0]
+
+    def put_many(self, rows):
+        if metrics.enabled:
+            metrics.record_call(self.name, "save")
+        with self._lock, self._exclusive():
+            self.load()
+            self._before_write()
+            stored = [self._upsert(row) for row in rows]
+            if not self._defer(len(stored)):
+                self._persist_rows(stored)
+            self._notify("put", stored)
+            return stored
+
+    def delete(self, key):
+        removed = self.delete_many([key])
+        return removed[0] if removed else None
+
+    def delete_many(self, keys):
+        """Delete the rows with these keys in one write; returns the rows that existed."""
+        if metrics.enabled:
+            metrics.record_call(self.name, "save")
+        with self._lock, self._exclusive():
+            self.load()
+            self._before_write()
+            removed = []
+            for key in dict.fromkeys(keys):
+                row = self._index.pop(key, None)
+                if row is not None:
+                    self._ungroup(row)
+                    removed.append(row)
+            if removed:
+                gone = {id(row) for row in removed}
+                self.data[:] = [r for r in self.data if id(r) not in gone]
+                if not self._defer(len(removed)):
+                    self._persist_delete([row[self.key] for row in removed])
+                self._notify("delete", removed)
+            return removed
+
+    def scan(self, batch_size=500):
+        """All rows in batches of `batch_size`, as they were when the scan started."""
+        rows = list(self.load())
+        for start in range(0, len(rows), batch_size):
+            yield rows[start:start + batch_size]
+
+    def _before_write(self):
+        """Called under the write locks once the data is current; for subclasses."""
+
+    def _remove(self, key):
+        row = self._index.pop(key, None)
+        if row is None:
+            return None
+        self._ungroup(row)
+        for i, r in enumerate(self.data):
+            if r is row:
+                del self.data[i]
+                break
+        return row
+
+    def _upsert(self, row):
+        current = self._index.get(row[self.key])
+        if current is None:
+            if self.record is not None and not isinstance(row, self.record):
+                row = self.record(row)
+            self.data.append(row)
+            self._add(row)
+            return row
+        if current is not row:
+            # Copy into the existing object so references held by the list
+            # and by callers stay valid. Update before dropping stale keys so
+            # concurrent readers never see a half-empty row.
+            self._ungroup(current)
+            current.update(row)
+            for field in [f for f in current if f not in row]:
+                del current[field]
+            self._group(current)
+        return current
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def _notify(self, event, rows):
+        for listener in self._listeners:
+            listener(event, rows)
+
+    def _records(self, rows):
+        if self.record is None:
+            return rows
+        return [row if isinstance(row, self.record) else self.record(row) for row in rows]
+
+    # Index maintenance
+
+    def _reindex(self, data):
+        # Built aside and swapped in: get() reads the index without the lock,
+        # so it must never see a half-filled one.
+        index = {}
+        group_index = {field: {} for field in self.groups}
+        max_key = 0
+        if self.key is not None:
+            for row in data:
+                key = row[self.key]
+                index[key] = row
+                if isinstance(key, int) and key > max_key:
+                    max_key = key
+                for field, rows in group_index.items():
+                    rows.setdefault(row.get(field), []).append(row)
+        self._index, self._group_index, self._max_key = index, group_index, max_key
+
+    def _add(self, row):
+        key = row[self.key]
+        self._index[key] = row
+        if isinstance(key, int) and key > self._max_key:
+            self._max_key = key
+        self._group(row)
+
+    def _group(self, row):
+        for field, index in self._group_index.items():
+            index.setdefault(row.get(field), []).append(row)
+
+    def _ungroup(self, row):
+        for field, index in self._group_index.items():
+            rows = index.get(row.get(field))
+            if rows is None:
+                continue
+            rows[:] = [r for r in rows if r is not row]
+            if not rows:
+                del index[row.get(field)]
+
+    # Persistence
+
+    def flush(self):
+        """Write out the changes write-behind mode has left pending, if any."""
+        if not self._dirty:
+            return
+        with self._lock, self._exclusive():
+            if not self._dirty:
+                return
+            if metrics.enabled:
+                metrics.record_call(self.name, "flush")
+            self._persist()
+
+    def _defer(self, changes):
+        """Leave `changes` to the write-behind flusher; False if they must be written now."""
+        if self.write_behind is None or writing_through():
+            return False
+        self._dirty = True
+        self.write_behind.mark(self, changes)
+        return True
+
+    def _persist(self):
+        self._write(self.data)
+        self._signature = self._written()
+        self._dirty = False
+
+    def _persist_rows(self, rows):
+        self._persist()
+
+    def _persist_delete(self, keys):
+        self._persist()
+
+    def _write(self, data, fsync=False):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        # Write-then-rename: readers (and other workers) never see a
+        # half-written file, and a crash leaves the previous version intact.
+        started = time.perf_counter()
+        text = json.dumps(data, indent=4, default=json_default).encode()
+        if metrics.enabled:
+            metrics.record_write(self.name, len(text), time.perf_counter() - started)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(text)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+class KeySequence:
+    """Integer keys for new rows; never hands out the same key twice, even under races."""
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def allocate(self):
+        with self._lock:
+            key = max(self._next, self.dataset.next_key())
+            self._next = key + 1
+            return key
+
+
+class DerivedIndex:
+    """Base for in-memory structures derived from a dataset's rows.
+
+    Subclasses implement `reset()`, `add(row)` and `discard(key)`; puts and
+    deletes are applied row by row, while a reload marks the structure stale
+    so it is rebuilt on next use. Readers wrap their work in `synced()`.
+    """
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self._lock = threading.RLock()
+        self._stale = True
+        self._generation = 0
+        dataset.subscribe(self._on_change)
+
+    def _on_change(self, event, rows):
+        with self._lock:
+            if event == "reload":
+                self._stale = True
+                self._generation += 1
+            elif not self._stale:
+                for row in rows:
+                    self.discard(row[self.dataset.key])
+                    if event == "put":
+                        self.add(row)
+
+    @contextmanager
+    def synced(self):
+        # Load outside our lock: a reload takes the dataset lock and then
+        # notifies us, so taking them in the other order could deadlock.
+        self.dataset.revalidate()
+        # Taken after revalidating: the first revalidation is itself a reload.
+        generation = self._generation
+        rows = self.dataset.load() if self._stale else None
+        with self._lock:
+            # rows is None only if a reload raced in after the check above;
+            # serve this call from the current state and rebuild on the next.
+            if self._stale and rows is not None:
+                self.reset()
+                for row in rows:
+                    self.add(row)
+                if generation == self._generation:
+                    self._stale = False
+            yield
+
+    def reset(self):
+        raise NotImplementedError
+
+    def add(self, row):
+        raise NotImplementedError
+
+    def discard(self, key):
+        raise NotImplementedError
+
+
+_datasets = {}
+_datasets_lock = threading.Lock()
+
+
+def get_dataset(path, default=None, cls=Dataset, **options):
+    dataset = _datasets.get(path)
+    if dataset is None:
+        with _datasets_lock:
+            dataset = _datasets.get(path)
+            if dataset is None:
+                dataset = _datasets[path] = cls(path, default, **options)
+    return dataset
+
+
+def invalidate_all():
+    for dataset in list(_datasets.values()):
+        dataset.invalidate()
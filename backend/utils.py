@@ -1,12 +1,97 @@
-import json
 import os
+from contextlib import nullcontext
 from datetime import datetime
 
+from . import config
+from .coordination import Coordinator, SharedCounters, SharedSequence
+from .journal import JournaledDataset
+from .records import ProductRecord
+from .snapshot import SnapshotDataset
+from .sqlite_store import (
+    SqliteDataset, get_database,
+    USERS_TABLE, CARTS_TABLE, ORDERS_TABLE, PRODUCTS_TABLE, REVIEWS_TABLE, SALES_TABLE
+)
+from .store import Dataset, KeySequence, get_dataset
+from .write_behind import WriteBehind
+
 DATA_DIR = "backend/data"
 USERS_FILE = f"{DATA_DIR}/users.json"
 CARTS_FILE = f"{DATA_DIR}/carts.json"
 ORDERS_FILE = f"{DATA_DIR}/orders.json"
 PRODUCTS_FILE = f"{DATA_DIR}/products.json"
+REVIEWS_FILE = f"{DATA_DIR}/reviews.json"
+SALES_FILE = f"{DATA_DIR}/sales.json"
+
+SQLITE_TABLES = {
+    USERS_FILE: USERS_TABLE,
+    CARTS_FILE: CARTS_TABLE,
+    ORDERS_FILE: ORDERS_TABLE,
+    PRODUCTS_FILE: PRODUCTS_TABLE,
+    REVIEWS_FILE: REVIEWS_TABLE,
+    SALES_FILE: SALES_TABLE,
+}
+
+shared_counters = (
+    SharedCounters(os.path.join(config.SHARED_DIR, ".shared")) if config.MULTIPROCESS else None
+)
+
+# Shared workers must see each other's writes, so they always write through.
+write_behind = (
+    WriteBehind(config.WRITE_BEHIND_INTERVAL, config.WRITE_BEHIND_MAX_PENDING)
+    if config.WRITE_BEHIND and not config.MULTIPROCESS else None
+)
+
+def _coordinator(path):
+    if shared_counters is None:
+        return None
+    name = os.path.splitext(os.path.basename(path))[0]
+    return Coordinator(shared_counters, config.SHARED_DIR, name)
+
+def open_store(path, **options):
+    """Dataset for one of the data files, backed by the configured storage mode."""
+    coordinator = _coordinator(path)
+    if config.STORAGE_MODE == "sqlite":
+        groups = options.get("groups", ())
+        return SqliteDataset(
+            get_database(config.SQLITE_PATH), SQLITE_TABLES[path], groups, coordinator
+        )
+    if config.STORAGE_MODE == "journal":
+        return get_dataset(
+            path, cls=JournaledDataset,
+            compact_every=config.JOURNAL_COMPACT_EVERY,
+            fsync=config.JOURNAL_FSYNC,
+            coordinator=coordinator,
+            write_behind=write_behind,
+            **options
+        )
+    cls = SnapshotDataset if config.SNAPSHOTS else Dataset
+    return get_dataset(path, cls=cls, coordinator=coordinator, write_behind=write_behind, **options)
+
+def open_sequence(dataset, name):
+    """Allocator of new integer keys for `dataset`, shared by all workers if configured."""
+    if shared_counters is None:
+        return KeySequence(dataset)
+    return SharedSequence(shared_counters, config.SHARED_DIR, name, dataset.next_key)
+
+def storage_transaction():
+    """Group writes to several stores: one transaction on SQLite, sequential otherwise."""
+    if config.STORAGE_MODE == "sqlite":
+        return get_database(config.SQLITE_PATH).transaction()
+    return nullcontext()
+
+users_store = open_store(USERS_FILE, key="username")
+carts_store = open_store(CARTS_FILE, key="username")
+orders_store = open_store(ORDERS_FILE, key="order_id", groups=["username"])
+products_store = open_store(
+    PRODUCTS_FILE, key="id", record=ProductRecord if config.COMPACT_PRODUCTS else None
+)
+reviews_store = open_store(REVIEWS_FILE, key="review_id", groups=["product_id"])
+# Sales rollups per day and per brand/product and day, kept up to date by checkout.
+sales_store = open_store(SALES_FILE, key="key")
+
+order_ids = open_sequence(orders_store, "orders")
+product_ids = open_sequence(products_store, "products")
+review_ids = open_sequence(reviews_store, "reviews")
 
 def ensure_data_dir():
     if not os.path.exists(DATA_DIR):
@@ -14,23 +99,37 @@ def ensure_data_dir():
 
 def load_json(path, default=[]):
     ensure_data_dir()
-    if not os.path.exists(path):
-        with open(path, "w") as f:
-            json.dump(default, f, indent=4)
-    with open(path, "r") as f:
-        return json.load(f)
+    return get_dataset(path, default).load()
 
 def save_json(path, data):
     ensure_data_dir()
-    with open(path, "w") as f:
-        json.dump(data, f, indent=4)
+    get_dataset(path).save(data)
 
 def calculate_product_rating(product):
-    reviews = product.get("reviews", [])
-    if not reviews:
+    if not product.get("review_count"):
+        # No reviews, or not aggregated yet (see `python manage.py rebuild-ratings`).
         return product.get("rating", 5)
-    avg = sum(r.get("rating", 5) for r in reviews) / len(reviews)
-    return round(avg, 2)
+    return round(product["rating_sum"] / product["review_count"], 2)
+
+def rebuild_rating_aggregate(product, reviews):
+    """Recompute review_count/rating_sum/rating from all of the product's reviews."""
+    product["review_count"] = len(reviews)
+    product["rating_sum"] = sum(r.get("rating", 5) for r in reviews)
+    product["rating"] = calculate_product_rating(product)
+
+def add_rating(product, rating):
+    """Fold one new review rating into the product's aggregate in O(1)."""
+    if "review_count" not in product:
+        rebuild_rating_aggregate(product, reviews_store.select("product_id", product["id"]))
+    product["review_count"] += 1
+    product["rating_sum"] += rating
+    product["rating"] = calculate_product_rating(product)
+
+def delete_product_reviews(product_ids):
+    """Delete every review of these (deleted) products."""
+    return reviews_store.delete_many(
+        r["review_id"] for product_id in product_ids for r in reviews_store.select("product_id", product_id)
+    )
 
 def validate_age(birthday_str):
     try:
@@ -46,17 +145,13 @@ def validate_age(birthday_str):
     return True, None
 
 def user_exists(username):
-    users = load_json(USERS_FILE)
-    return any(u["username"] == username for u in users)
+    return users_store.get(username) is not None
 
 def find_user(username):
-    users = load_json(USERS_FILE)
-    return next((u for u in users if u["username"] == username), None)
+    return users_store.get(username)
 
 def find_product(product_id):
-    products = load_json(PRODUCTS_FILE)
-    return next((p for p in products if p["id"] == product_id), None)
+    return products_store.get(product_id)
 
 def find_user_cart(username):
-    carts = load_json(CARTS_FILE)
-    return next((c for c in carts if c["username"] == username), None)
+    return carts_store.get(username)
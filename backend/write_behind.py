@@ -0,0 +1,101 @@
+import atexit
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_write_through = ContextVar("write_through", default=False)
+
+
+@contextmanager
+def sync_writes():
+    """Write changes made inside the block before it returns, even in write-behind mode."""
+    token = _write_through.set(True)
+    try:
+        yield
+    finally:
+        _write_through.reset(token)
+
+
+def writing_through():
+    return _write_through.get()
+
+
+class WriteBehind:
+    """Background writer for datasets in write-behind mode.
+
+    A mutation only changes memory and reports itself with `mark`; this
+    thread then writes each dirty dataset once for all the changes that
+    piled up. A dataset is written `interval` seconds after its first
+    pending change at the latest (the bound on what a crash can lose), or
+    as soon as `max_pending` changes are waiting. Whatever is still pending
+    is written when the process exits.
+    """
+
+    def __init__(self, interval, max_pending):
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending = {}  # dataset -> [time of first pending change, pending changes]
+        self._condition = threading.Condition()
+        self._thread = None
+        self._closed = False
+        atexit.register(self.close)
+
+    def mark(self, dataset, count=1):
+        with self._condition:
+            entry = self._pending.get(dataset)
+            if entry is None:
+                entry = self._pending[dataset] = [time.monotonic(), 0]
+                # The flusher may be waiting with no deadline at all; give it one.
+                self._condition.notify()
+            entry[1] += count
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+            if entry[1] >= self.max_pending:
+                self._condition.notify()
+
+    def _due(self, now):
+        return [
+            dataset for dataset, (since, count) in self._pending.items()
+            if count >= self.max_pending or now - since >= self.interval
+        ]
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    if self._closed:
+                        return
+                    now = time.monotonic()
+                    due = self._due(now)
+                    if due:
+                        break
+                    oldest = min((since for since, _ in self._pending.values()), default=None)
+                    self._condition.wait(None if oldest is None else oldest + self.interval - now)
+                for dataset in due:
+                    del self._pending[dataset]
+            for dataset in due:
+                self._flush(dataset)
+
+    def _flush(self, dataset):
+        try:
+            dataset.flush()
+        except Exception:
+            # Keep the changes pending and try again after the next interval.
+            self.mark(dataset, 0)
+
+    def flush_all(self):
+        """Write every dirty dataset now."""
+        with self._condition:
+            pending, self._pending = list(self._pending), {}
+        for dataset in pending:
+            dataset.flush()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush_all()
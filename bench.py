@@ -0,0 +1,474 @@
+import argparse
+import http.client
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Dataset sizes; every count can also be given on the command line.
+SCALES = {
+    "small": {"products": 1_000, "users": 1_000, "orders": 10_000},
+    "medium": {"products": 100_000, "users": 10_000, "orders": 100_000},
+    "large": {"products": 100_000, "users": 10_000, "orders": 1_000_000},
+}
+
+SCENARIOS = ["listing", "search", "detail", "cart_add", "get_cart", "checkout", "order_history"]
+
+BRANDS = ["Asus", "Lenovo", "MSI", "HP", "Dell", "Acer", "Apple", "Samsung", "Huawei", "Gigabyte"]
+LINES = ["Vivobook", "ThinkPad", "IdeaPad", "Katana", "Pavilion", "Inspiron", "Aspire",
+         "MacBook", "Galaxy Book", "MateBook", "Aorus", "ZenBook", "Legion", "Omen", "Nitro"]
+SPECS = ["i5", "i7", "i9", "Ryzen 5", "Ryzen 7", "RTX 4050", "RTX 4060", "RTX 4070",
+         "16GB", "32GB", "512GB SSD", "1TB SSD", "OLED", "144Hz", "Touch"]
+WORDS = ["fast", "light", "gaming", "business", "student", "creator", "quiet", "bright",
+         "slim", "long", "battery", "premium", "compact", "durable", "portable"]
+DATA_FILES = ["products.json", "reviews.json", "users.json", "carts.json", "orders.json"]
+# Bumped whenever the generated files change shape, so cached datasets are rebuilt.
+DATASET_FORMAT = 2
+
+
+# Dataset generation
+
+def review_ratings(seed, pid):
+    # Own generator per product: products and reviews are written in separate passes.
+    rng = random.Random(seed * 1_000_003 + pid)
+    return [rng.randint(1, 5) for _ in range(rng.randint(0, 3))]
+
+
+def make_product(rng, pid, ratings):
+    brand = rng.choice(BRANDS)
+    title = f"{brand} {rng.choice(LINES)} {' '.join(rng.sample(SPECS, 3))} {pid}"
+    return {
+        "id": pid,
+        "title": title,
+        "description": " ".join(rng.sample(WORDS, 6)),
+        "price": round(rng.uniform(300, 4000), 2),
+        "discountPercentage": rng.choice([0, 0, round(rng.uniform(5, 15), 2)]),
+        "rating": round(sum(ratings) / len(ratings), 2) if ratings else 5,
+        # Large enough that checkouts never run a product out of stock.
+        "stock": 1_000_000_000,
+        "brand": brand,
+        "category": "laptops",
+        "weight": 2,
+        "dimensions": {"width": 35.0, "height": 2.0, "depth": 24.0},
+        "warrantyInformation": "1 year warranty",
+        "shippingInformation": "Ships in 1 week",
+        "availabilityStatus": "In Stock",
+        "review_count": len(ratings),
+        "rating_sum": sum(ratings),
+        "images": [],
+        "thumbnail": "",
+        "stars": 5,
+        "sold": 0,
+    }
+
+
+def username(i):
+    return f"bench{i}"
+
+
+def write_rows(path, rows):
+    """Write a JSON list row by row, so the largest datasets need not be built in memory."""
+    with open(path, "w") as f:
+        f.write("[")
+        for i, row in enumerate(rows):
+            f.write(",\n" if i else "\n")
+            f.write(json.dumps(row))
+        f.write("\n]")
+
+
+def generate(data_dir, spec, seed):
+    rng = random.Random(seed)
+    os.makedirs(data_dir, exist_ok=True)
+    write_rows(os.path.join(data_dir, "products.json"), (
+        make_product(rng, pid, review_ratings(seed, pid)) for pid in range(1, spec["products"] + 1)
+    ))
+
+    def reviews():
+        review_id = 0
+        for pid in range(1, spec["products"] + 1):
+            for rating in review_ratings(seed, pid):
+                review_id += 1
+                yield {"review_id": review_id, "product_id": pid, "rating": rating,
+                       "comment": rng.choice(WORDS), "date": "2025-01-01", "reviewerName": "Bench"}
+
+    write_rows(os.path.join(data_dir, "reviews.json"), reviews())
+    write_rows(os.path.join(data_dir, "users.json"), (
+        {"username": username(i), "password": "bench", "name": "Bench", "surname": "",
+         "gender": "male", "birthday": "1990-01-01"}
+        for i in range(spec["users"])
+    ))
+    write_rows(os.path.join(data_dir, "carts.json"), [])
+
+    start = date(2023, 1, 1)
+
+    def orders():
+        # Ids and dates both increase, as they do for real checkouts.
+        for order_id in range(1, spec["orders"] + 1):
+            items = [
+                {"product_id": rng.randint(1, spec["products"]), "title": "", "quantity": rng.randint(1, 3),
+                 "price": 1000.0}
+                for _ in range(rng.randint(1, 3))
+            ]
+            day = start + timedelta(days=order_id * 730 // max(spec["orders"], 1))
+            yield {
+                "order_id": order_id,
+                "username": username(rng.randrange(spec["users"])),
+                "date": day.isoformat(),
+                "items": items,
+                "total_price": sum(i["price"] * i["quantity"] for i in items),
+            }
+
+    write_rows(os.path.join(data_dir, "orders.json"), orders())
+    with open(os.path.join(data_dir, "bench.json"), "w") as f:
+        json.dump({"spec": spec, "seed": seed, "format": DATASET_FORMAT}, f)
+
+
+def prepare(workdir, spec, seed):
+    """Make sure `workdir`/dataset holds the dataset for `spec`; True if it was (re)generated.
+
+    The dataset itself is never modified: every run works on a fresh copy.
+    """
+    dataset_dir = os.path.join(workdir, "dataset")
+    meta_path = os.path.join(dataset_dir, "bench.json")
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            if json.load(f) == {"spec": spec, "seed": seed, "format": DATASET_FORMAT}:
+                return False
+    shutil.rmtree(dataset_dir, ignore_errors=True)
+    generate(dataset_dir, spec, seed)
+    return True
+
+
+def build_sqlite(dataset_dir):
+    """shop.db for the dataset, imported like `manage.py migrate-sqlite` does (cached)."""
+    db_path = os.path.join(dataset_dir, "shop.db")
+    if os.path.exists(db_path):
+        return
+    from backend.sqlite_store import (
+        SqliteDataset, get_database, USERS_TABLE, CARTS_TABLE, ORDERS_TABLE, PRODUCTS_TABLE,
+        REVIEWS_TABLE
+    )
+    from backend.store import Dataset
+
+    db = get_database(db_path)
+    tables = [PRODUCTS_TABLE, REVIEWS_TABLE, USERS_TABLE, CARTS_TABLE, ORDERS_TABLE]
+    for name, table in zip(DATA_FILES, tables):
+        SqliteDataset(db, table).save(Dataset(os.path.join(dataset_dir, name)).load())
+    # Fold the WAL into shop.db: runs copy that file alone.
+    db.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+def fresh_copy(workdir, storage):
+    """Copy the dataset into `workdir`/run/backend/data and return the run directory."""
+    dataset_dir = os.path.join(workdir, "dataset")
+    run_dir = os.path.join(workdir, "run")
+    data_dir = os.path.join(run_dir, "backend", "data")
+    shutil.rmtree(run_dir, ignore_errors=True)
+    os.makedirs(data_dir)
+    names = ["shop.db"] if storage == "sqlite" else DATA_FILES
+    for name in names:
+        shutil.copy(os.path.join(dataset_dir, name), data_dir)
+    return run_dir
+
+
+# Drivers: the same request interface over the Flask test client or HTTP
+
+class TestClientDriver:
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method, path, body=None):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, json=body)
+        response.get_data()
+        return response.status_code
+
+
+class HttpDriver:
+    """Real HTTP over a keep-alive connection per thread."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self._local = threading.local()
+
+    def request(self, method, path, body=None):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        payload = json.dumps(body) if body is not None else None
+        try:
+            conn.request(method, path, payload, headers)
+            response = conn.getresponse()
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            conn.request(method, path, payload, headers)
+            response = conn.getresponse()
+        response.read()
+        return response.status
+
+
+def start_server(app):
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class QuietHandler(WSGIRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_request(self, *args):
+            pass
+
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# Scenarios: each returns a callable doing one timed request
+
+def scenario(name, driver, spec):
+    products = spec["products"]
+    users = spec["users"]
+
+    def user(rng):
+        return username(rng.randrange(users))
+
+    if name == "listing":
+        return lambda rng: driver.request(
+            "GET", f"/products?limit=24&offset={rng.randrange(max(products - 24, 1))}"
+        )
+    if name == "search":
+        return lambda rng: driver.request(
+            "GET", f"/products?limit=24&q={rng.choice(LINES).split()[0]}+{rng.choice(SPECS).split()[0]}"
+        )
+    if name == "detail":
+        return lambda rng: driver.request("GET", f"/products/{rng.randint(1, products)}")
+    if name == "cart_add":
+        return lambda rng: driver.request(
+            "POST", f"/cart/{user(rng)}/add", {"product_id": rng.randint(1, products), "quantity": 1}
+        )
+    if name == "get_cart":
+        return lambda rng: driver.request("GET", f"/cart/{user(rng)}")
+    if name == "checkout":
+        def checkout(rng, setup):
+            buyer = user(rng)
+            setup(lambda: driver.request(
+                "POST", f"/cart/{buyer}/add", {"product_id": rng.randint(1, products), "quantity": 1}
+            ))
+            return driver.request("POST", "/checkout", {"username": buyer})
+        checkout.needs_setup = True
+        return checkout
+    if name == "order_history":
+        return lambda rng: driver.request("GET", f"/orders/{user(rng)}?limit=20")
+    raise ValueError(f"unknown scenario {name}")
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def run_scenario(call, requests, warmup, concurrency, seed):
+    """Run `requests` timed calls over `concurrency` threads; latencies in milliseconds."""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    needs_setup = getattr(call, "needs_setup", False)
+
+    def worker(index, count, record):
+        rng = random.Random(seed * 1000 + index)
+        local = []
+        failed = 0
+        for _ in range(count):
+            if needs_setup:
+                # Untimed preparation (e.g. filling the cart before a checkout).
+                paused = [0.0]
+
+                def setup(fn):
+                    t = time.perf_counter()
+                    fn()
+                    paused[0] += time.perf_counter() - t
+
+                start = time.perf_counter()
+                status = call(rng, setup)
+                elapsed = time.perf_counter() - start - paused[0]
+            else:
+                start = time.perf_counter()
+                status = call(rng)
+                elapsed = time.perf_counter() - start
+            local.append(elapsed * 1000)
+            failed += status >= 400
+        if record:
+            with lock:
+                latencies.extend(local)
+                errors[0] += failed
+
+    def run(total, record):
+        shares = [total // concurrency + (i < total % concurrency) for i in range(concurrency)]
+        threads = [threading.Thread(target=worker, args=(i, n, record)) for i, n in enumerate(shares)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return time.perf_counter() - start
+
+    run(warmup, False)
+    wall = run(requests, True)
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "seconds": round(wall, 4),
+        # Wall-clock throughput; for checkout it includes the untimed cart setup.
+        "throughput_rps": round(len(latencies) / wall, 1) if wall else None,
+        "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else None,
+        "p50_ms": round(percentile(latencies, 50), 3) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95), 3) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99), 3) if latencies else None,
+        "max_ms": round(latencies[-1], 3) if latencies else None,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    """Relative change of every metric against a previous JSON report."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    changes = {}
+    for name, current in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        changes[name] = {
+            metric: round(current[metric] / before[metric] - 1, 3)
+            for metric in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+            if current.get(metric) and before.get(metric)
+        }
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the API hot paths on a synthetic dataset")
+    parser.add_argument("--scale", choices=SCALES, default="small", help="dataset size preset")
+    parser.add_argument("--products", type=int, help="override the preset's product count")
+    parser.add_argument("--users", type=int, help="override the preset's user count")
+    parser.add_argument("--orders", type=int, help="override the preset's order count")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"comma-separated subset of {','.join(SCENARIOS)}")
+    parser.add_argument("--requests", type=int, default=500, help="timed requests per scenario")
+    parser.add_argument("--warmup", type=int, default=50, help="untimed requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=1, help="client threads")
+    parser.add_argument("--server", action="store_true",
+                        help="go through a real local HTTP server instead of the Flask test client")
+    parser.add_argument("--storage", choices=["json", "journal", "sqlite"], default="json",
+                        help="SHOP_STORAGE mode to benchmark")
+    parser.add_argument("--workdir", help="where the dataset is generated and kept between runs "
+                                          "(default: a new temporary directory)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="previous JSON report to compare against")
+    args = parser.parse_args()
+
+    spec = dict(SCALES[args.scale])
+    for key in spec:
+        if getattr(args, key) is not None:
+            spec[key] = getattr(args, key)
+    names = [n.strip() for n in args.scenarios.split(",") if n.strip()]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="shop-bench-"))
+    output = os.path.abspath(args.output) if args.output else None
+    baseline = os.path.abspath(args.baseline) if args.baseline else None
+    started = time.perf_counter()
+    generated = prepare(workdir, spec, args.seed)
+    generate_seconds = time.perf_counter() - started
+    print(f"dataset {spec} in {workdir} ({'generated' if generated else 'reused'}, "
+          f"{generate_seconds:.1f}s)", file=sys.stderr)
+
+    # The backend reads its configuration when it is first imported and
+    # resolves backend/data relative to the working directory.
+    os.environ["SHOP_STORAGE"] = args.storage
+    os.environ["SHOP_SQLITE_PATH"] = "backend/data/shop.db"
+    sys.path.insert(0, REPO_DIR)
+    if args.storage == "sqlite":
+        build_sqlite(os.path.join(workdir, "dataset"))
+    os.chdir(fresh_copy(workdir, args.storage))
+    from backend import app
+
+    server = None
+    if args.server:
+        server = start_server(app)
+        driver = HttpDriver("127.0.0.1", server.server_port)
+    else:
+        driver = TestClientDriver(app)
+
+    started = time.perf_counter()
+    driver.request("GET", "/products?limit=1")  # load the catalog and build its indexes
+    load_seconds = time.perf_counter() - started
+
+    results = {}
+    for name in names:
+        print(f"running {name}", file=sys.stderr)
+        call = scenario(name, driver, spec)
+        results[name] = run_scenario(call, args.requests, args.warmup, args.concurrency, args.seed)
+
+    if server is not None:
+        server.shutdown()
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "driver": "http" if args.server else "test_client",
+            "storage": args.storage,
+            "dataset": spec,
+            "seed": args.seed,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "generate_seconds": round(generate_seconds, 2),
+            "first_request_seconds": round(load_seconds, 3),
+        },
+        "results": results,
+    }
+    if baseline:
+        report["change_vs_baseline"] = compare(results, baseline)
+
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,8 +9,9 @@ async function apiCall(endpoint, options = {}) {
     return res.json();
 }
 
-async function getProducts() { return apiCall('/products'); }
+async function getProducts(params = {}) { const qs = new URLSearchParams(params).toString(); return apiCall(`/products${qs ? `?${qs}` : ''}`); }
 async function getProduct(id) { return apiCall(`/products/${id}`); }
+async function getProductReviews(id, params = {}) { const qs = new URLSearchParams(params).toString(); return apiCall(`/products/${id}/reviews${qs ? `?${qs}` : ''}`); }
 async function addReview(id, username, comment, rating) { return apiCall(`/products/${id}/review`, { method: 'POST', body: JSON.stringify({ username, comment, rating }) }); }
 async function registerUser(data) { return apiCall('/register', { method: 'POST', body: JSON.stringify(data) }); }
 async function loginUser(username, password) { return apiCall('/login', { method: 'POST', body: JSON.stringify({ username, password }) }); }
@@ -20,8 +21,9 @@ async function getCart(username) { return apiCall(`/cart/${username}`); }
 async function addToCart(username, product_id, quantity = 1) { return apiCall(`/cart/${username}/add`, { method: 'POST', body: JSON.stringify({ product_id, quantity }) }); }
 async function removeFromCart(username, product_id) { return apiCall(`/cart/${username}/remove`, { method: 'POST', body: JSON.stringify({ product_id }) }); }
 async function updateCartItem(username, product_id, quantity) { return apiCall(`/cart/${username}/update`, { method: 'PUT', body: JSON.stringify({ product_id, quantity }) }); }
+async function updateCartBatch(username, ops) { return apiCall(`/cart/${username}/batch`, { method: 'POST', body: JSON.stringify({ ops }) }); }
 async function checkout(username) { return apiCall('/checkout', { method: 'POST', body: JSON.stringify({ username }) }); }
-async function getUserOrders(username) { return apiCall(`/orders/${username}`); }
+async function getUserOrders(username, params = {}) { const qs = new URLSearchParams(params).toString(); return apiCall(`/orders/${username}${qs ? `?${qs}` : ''}`); }
 
 function getCurrentUser() { return localStorage.getItem('username'); }
 function setCurrentUser(username) { localStorage.setItem('username', username); }
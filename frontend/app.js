@@ -34,8 +34,7 @@ function setupBrands() {
 }
 
 function calcRating(p) {
-    if (!p.reviews?.length) return p.rating || 5;
-    return Math.round(p.reviews.reduce((s, r) => s + r.rating, 0) / p.reviews.length * 10) / 10;
+    return Math.round((p.rating || 5) * 10) / 10;
 }
 
 function applyFilters() {
@@ -4,7 +4,7 @@ async function initCart() {
     if (!isLoggedIn()) { window.location.href = 'login.html'; return; }
     updateAuthNav();
     try {
-        allProducts = await getProducts();
+        allProducts = await getProducts({ fields: 'id,title,brand,price,stock,thumbnail,images' });
         await loadCart();
         updateCartCount();
     } catch (e) { showError('Failed to load cart'); }
@@ -39,24 +39,23 @@ function displayCart() {
         updateSummary(0, 0);
         return;
     }
-    let sub = 0;
+    const byId = new Map(allProducts.map(p => [p.id, p]));
     div.innerHTML = items.map(item => {
-        const p = allProducts.find(x => x.id === item.product_id);
+        const p = byId.get(item.product_id);
         if (!p) return '';
-        const total = p.price * item.quantity;
-        sub += total;
+        const total = item.subtotal;
         const img = p.thumbnail || p.images?.[0] || '';
-        return `<div style="background:linear-gradient(135deg,rgba(51,30,100,.3),rgba(24,36,62,.3));border:1px solid rgba(255,0,110,.2);border-radius:12px;padding:1.5rem;display:grid;grid-template-columns:100px 1fr auto;gap:1.5rem;align-items:center"><div style="width:100px;height:100px;background:rgba(255,255,255,.1);border-radius:8px;overflow:hidden"><img src="${img}" style="width:100%;height:100%;object-fit:cover"></div><div><h3 style="margin-bottom:.5rem;color:#ff006e">${p.title}</h3><p style="color:#aaa;font-size:.9rem">${p.brand}</p><p style="color:#8338ec;font-weight:600">$${p.price}</p></div><div style="display:flex;flex-direction:column;align-items:center;gap:.5rem"><div style="display:flex;gap:.5rem"><button class="btn btn-sm" style="width:35px;padding:.4rem" onclick="updateQty(${p.id},${item.quantity - 1})">−</button><input type="number" value="${item.quantity}" min="1" max="${p.stock}" onchange="updateQty(${p.id},this.value)" style="width:50px;padding:.4rem;text-align:center;border-radius:6px;border:1px solid rgba(255,0,110,.3);background:rgba(255,255,255,.05);color:#fff"><button class="btn btn-sm" style="width:35px;padding:.4rem" onclick="updateQty(${p.id},${item.quantity + 1})">+</button></div><p style="font-size:.85rem;color:#aaa">Stock: ${p.stock}</p></div><div style="display:flex;flex-direction:column;align-items:flex-end;gap:.5rem"><div style="font-size:1.2rem;font-weight:bold;color:#ff006e">$${total}</div><button class="btn btn-sm" style="background:rgba(255,100,100,.2);border:1px solid rgba(255,100,100,.5);color:#ff6464" onclick="removeItem(${p.id})">🗑️ Remove</button></div></div>`;
+        return `<div style="background:linear-gradient(135deg,rgba(51,30,100,.3),rgba(24,36,62,.3));border:1px solid rgba(255,0,110,.2);border-radius:12px;padding:1.5rem;display:grid;grid-template-columns:100px 1fr auto;gap:1.5rem;align-items:center"><div style="width:100px;height:100px;background:rgba(255,255,255,.1);border-radius:8px;overflow:hidden"><img src="${img}" style="width:100%;height:100%;object-fit:cover"></div><div><h3 style="margin-bottom:.5rem;color:#ff006e">${p.title}</h3><p style="color:#aaa;font-size:.9rem">${p.brand}</p><p style="color:#8338ec;font-weight:600">$${item.unit_price}${item.discountPercentage ? ` <s style="color:#aaa;font-weight:400">$${item.price}</s>` : ''}</p></div><div style="display:flex;flex-direction:column;align-items:center;gap:.5rem"><div style="display:flex;gap:.5rem"><button class="btn btn-sm" style="width:35px;padding:.4rem" onclick="updateQty(${p.id},${item.quantity - 1})">−</button><input type="number" value="${item.quantity}" min="1" max="${p.stock}" onchange="updateQty(${p.id},this.value)" style="width:50px;padding:.4rem;text-align:center;border-radius:6px;border:1px solid rgba(255,0,110,.3);background:rgba(255,255,255,.05);color:#fff"><button class="btn btn-sm" style="width:35px;padding:.4rem" onclick="updateQty(${p.id},${item.quantity + 1})">+</button></div><p style="font-size:.85rem;color:#aaa">Stock: ${p.stock}</p></div><div style="display:flex;flex-direction:column;align-items:flex-end;gap:.5rem"><div style="font-size:1.2rem;font-weight:bold;color:#ff006e">$${total}</div><button class="btn btn-sm" style="background:rgba(255,100,100,.2);border:1px solid rgba(255,100,100,.5);color:#ff6464" onclick="removeItem(${p.id})">🗑️ Remove</button></div></div>`;
     }).join('');
-    updateSummary(sub, sub * 0.1);
+    updateSummary(cartData.total, cartData.total * 0.1);
 }
 
 async function updateQty(id, qty) {
     qty = parseInt(qty);
     if (qty < 1) { removeItem(id); return; }
     try {
-        await updateCartItem(getCurrentUser(), id, qty);
-        await loadCart();
+        cartData = await updateCartBatch(getCurrentUser(), [{ op: 'update', product_id: id, quantity: qty }]);
+        displayCart();
         showSuccess('✅ Updated');
     } catch (e) { showError('Failed'); }
 }
@@ -64,8 +63,8 @@ async function updateQty(id, qty) {
 async function removeItem(id) {
     if (!confirm('Remove?')) return;
     try {
-        await removeFromCart(getCurrentUser(), id);
-        await loadCart();
+        cartData = await updateCartBatch(getCurrentUser(), [{ op: 'remove', product_id: id }]);
+        displayCart();
         showSuccess('✅ Removed');
     } catch (e) { showError('Failed'); }
 }
@@ -33,22 +33,38 @@ function setMainImage(src) {
 }
 
 function calcRating(p) {
-    if (!p.reviews?.length) return p.rating || 5;
-    return Math.round(p.reviews.reduce((s, r) => s + r.rating, 0) / p.reviews.length * 10) / 10;
+    return Math.round((p.rating || 5) * 10) / 10;
+}
+
+function reviewCard(r) {
+    if (!r) return '';
+    const nameSource = r.reviewerName || r.username || r.name || r.user;
+    const reviewerName = nameSource && String(nameSource).trim() ? String(nameSource).trim() : 'Anonymous';
+    const rating = r.rating || 0;
+    const comment = r.comment || '';
+    return `<div style="background:linear-gradient(135deg,rgba(51,30,100,.3),rgba(24,36,62,.3));padding:1.2rem;border-radius:8px;border-left:4px solid #ff006e"><div style="display:flex;justify-content:space-between;align-items:center;margin-bottom:.5rem"><strong style="color:#ff006e">${reviewerName}</strong><span style="color:#8338ec;font-weight:600">${'⭐'.repeat(rating)}</span></div><p style="color:#ccc;line-height:1.5;font-size:.95rem">${comment}</p></div>`;
+}
+
+function appendReviews(reviews, nextCursor) {
+    const div = document.getElementById('comments');
+    document.getElementById('moreReviews')?.remove();
+    div.insertAdjacentHTML('beforeend', reviews.map(reviewCard).join(''));
+    if (nextCursor) div.insertAdjacentHTML('beforeend', `<button id="moreReviews" class="btn btn-secondary" onclick="loadMoreReviews('${nextCursor}')">More reviews (${product.review_count - div.children.length} left)</button>`);
+}
+
+async function loadMoreReviews(cursor) {
+    try {
+        const page = await getProductReviews(product.id, { cursor, limit: 10 });
+        appendReviews(page.items, page.next_cursor);
+    } catch (e) { showError('Failed'); }
 }
 
 function loadComments() {
     const div = document.getElementById('comments');
     const reviews = product.reviews || [];
     if (!reviews.length) { div.innerHTML = '<p style="color:#aaa;text-align:center;padding:2rem">No reviews yet. Be the first to review!</p>'; return; }
-    div.innerHTML = reviews.map(r => {
-        if (!r) return '';
-        const nameSource = r.reviewerName || r.username || r.name || r.user;
-        const reviewerName = nameSource && String(nameSource).trim() ? String(nameSource).trim() : 'Anonymous';
-        const rating = r.rating || 0;
-        const comment = r.comment || '';
-        return `<div style="background:linear-gradient(135deg,rgba(51,30,100,.3),rgba(24,36,62,.3));padding:1.2rem;border-radius:8px;border-left:4px solid #ff006e"><div style="display:flex;justify-content:space-between;align-items:center;margin-bottom:.5rem"><strong style="color:#ff006e">${reviewerName}</strong><span style="color:#8338ec;font-weight:600">${'⭐'.repeat(rating)}</span></div><p style="color:#ccc;line-height:1.5;font-size:.95rem">${comment}</p></div>`;
-    }).join('');
+    div.innerHTML = '';
+    appendReviews(reviews, product.reviews_next_cursor);
 }
 
 async function addComment() {
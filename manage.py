@@ -0,0 +1,175 @@
+import argparse
+import json
+import time
+
+from backend import config
+from backend.analytics import np, rebuild_rows
+from backend.catalog_sync import REMOVE_POLICIES, sync_products
+from backend.records import memory_report
+from backend.sqlite_store import get_database, SqliteDataset
+from backend.snapshot import SnapshotDataset
+from backend.store import Dataset
+from backend.utils import (
+    PRODUCTS_FILE, SQLITE_TABLES, ensure_data_dir, orders_store, products_store, reviews_store, review_ids, sales_store,
+    rebuild_rating_aggregate, storage_transaction
+)
+
+
+def migrate_sqlite(args):
+    """Import backend/data/*.json into the SQLite database, replacing its contents."""
+    ensure_data_dir()
+    db = get_database(args.db)
+    for path, table in SQLITE_TABLES.items():
+        rows = Dataset(path).load()
+        SqliteDataset(db, table).save(rows)
+        print(f"{path}: {len(rows)} rows -> {args.db}:{table.name}")
+
+
+def reviews_by_product():
+    grouped = {}
+    for review in reviews_store.load():
+        grouped.setdefault(review["product_id"], []).append(review)
+    return grouped
+
+
+def rebuild_ratings(args):
+    """Recompute every product's review_count/rating_sum/rating from its reviews."""
+    products = [dict(product) for product in products_store.load()]
+    grouped = reviews_by_product()
+    for product in products:
+        rebuild_rating_aggregate(product, grouped.get(product["id"], []))
+    products_store.put_many(products)
+    print(f"Rebuilt rating aggregates for {len(products)} products")
+
+
+def legacy_sqlite_reviews():
+    """{product id: reviews} from the old `reviews` child table of products, if any."""
+    conn = get_database(config.SQLITE_PATH).conn
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'reviews'").fetchone():
+        return {}
+    grouped = {}
+    for product_id, rating, comment, date, reviewer in conn.execute(
+        "SELECT product_id, rating, comment, date, reviewer_name FROM reviews ORDER BY product_id, position"
+    ):
+        review = {"rating": rating, "comment": comment, "date": date, "reviewerName": reviewer}
+        grouped.setdefault(product_id, []).append({k: v for k, v in review.items() if v is not None})
+    return grouped
+
+
+def migrate_reviews(args):
+    """Move the reviews embedded in products into the reviews store."""
+    products = products_store.load()
+    embedded = {p["id"]: p["reviews"] for p in products if "reviews" in p}
+    if config.STORAGE_MODE == "sqlite":
+        embedded.update(legacy_sqlite_reviews())
+    moved = [
+        {"review_id": review_ids.allocate(), "product_id": product_id, **review}
+        for product_id, reviews in embedded.items() for review in reviews
+    ]
+    grouped = reviews_by_product()
+    for review in moved:
+        grouped.setdefault(review["product_id"], []).append(review)
+    updated = []
+    for product in products:
+        if product["id"] in embedded:
+            product = {k: v for k, v in product.items() if k != "reviews"}
+            rebuild_rating_aggregate(product, grouped.get(product["id"], []))
+            updated.append(product)
+
+    with storage_transaction():
+        if moved:
+            reviews_store.put_many(moved)
+        if updated:
+            products_store.put_many(updated)
+        if config.STORAGE_MODE == "sqlite":
+            get_database(config.SQLITE_PATH).conn.execute("DROP TABLE IF EXISTS reviews")
+    print(f"Moved {len(moved)} reviews out of {len(updated)} products")
+
+
+def rebuild_sales(args):
+    """Recompute the sales rollups behind /admin/analytics from every order."""
+    started = time.perf_counter()
+    orders = orders_store.load()
+    brands = {p["id"]: p.get("brand") for p in products_store.load()}
+    loaded = time.perf_counter()
+    vectorized = np is not None and not args.python
+    rows = rebuild_rows(orders, brands, vectorized)
+    computed = time.perf_counter()
+    sales_store.save(rows)
+    print(f"{len(orders)} orders -> {len(rows)} rollup rows "
+          f"({'NumPy' if vectorized else 'Python'}: load {loaded - started:.2f}s, "
+          f"aggregate {computed - loaded:.2f}s, save {time.perf_counter() - computed:.2f}s)")
+
+
+def build_snapshots(args):
+    """Write the binary startup snapshots of the JSON data files now."""
+    for path in SQLITE_TABLES:
+        dataset = SnapshotDataset(path, key=SQLITE_TABLES[path].key)
+        started = time.perf_counter()
+        built = dataset.build_snapshot()
+        print(f"{dataset.snapshot_path}: " + (
+            f"{len(dataset.load())} rows ({time.perf_counter() - started:.2f}s)" if built
+            else "skipped (empty, or keys are not integers)"
+        ))
+
+
+def report_memory(args):
+    """Compare the memory the products take as dicts and as compact records."""
+    with open(args.input, "rb") as f:
+        report = memory_report(f.read())
+    count = report["products"]
+    print(f"{count} products from {args.input}")
+    for name in ("dict", "record"):
+        per_product = report[f"{name}_bytes_per_product"]
+        print(f"  {name + 's':8} {report[f'{name}_bytes'] / 2**20:8.1f} MiB  "
+              f"{per_product:6} B/product  ~{per_product * 10**6 / 2**30:.2f} GiB per 1M products")
+    print(f"  saved    {report['saved']:.1%}")
+
+
+def sync_catalog(args):
+    """Merge a scraper output file into the products, writing only what changed."""
+    with open(args.input, encoding="utf-8") as f:
+        items = json.load(f)
+    counts = sync_products(items, remove=args.remove, dry_run=args.dry_run)
+    print(", ".join(f"{name}: {count}" for name, count in counts.items())
+          + (" (dry run, nothing written)" if args.dry_run else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="E-Commerce backend maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate = commands.add_parser("migrate-sqlite", help=migrate_sqlite.__doc__)
+    migrate.add_argument("--db", default=config.SQLITE_PATH, help="SQLite database file")
+    migrate.set_defaults(func=migrate_sqlite)
+
+    ratings = commands.add_parser("rebuild-ratings", help=rebuild_ratings.__doc__)
+    ratings.set_defaults(func=rebuild_ratings)
+
+    reviews = commands.add_parser("migrate-reviews", help=migrate_reviews.__doc__)
+    reviews.set_defaults(func=migrate_reviews)
+
+    sales = commands.add_parser("rebuild-sales", help=rebuild_sales.__doc__)
+    sales.add_argument("--python", action="store_true", help="don't use NumPy even if it is installed")
+    sales.set_defaults(func=rebuild_sales)
+
+    snapshots = commands.add_parser("build-snapshots", help=build_snapshots.__doc__)
+    snapshots.set_defaults(func=build_snapshots)
+
+    memory = commands.add_parser("memory-report", help=report_memory.__doc__)
+    memory.add_argument("input", nargs="?", default=PRODUCTS_FILE, help="products JSON file")
+    memory.set_defaults(func=report_memory)
+
+    sync = commands.add_parser("sync-catalog", help=sync_catalog.__doc__)
+    sync.add_argument("input", nargs="?", default="aztech_products.json", help="scraper output file")
+    sync.add_argument("--remove", choices=REMOVE_POLICIES, default="deactivate",
+                      help="what to do with listed products missing from the input")
+    sync.add_argument("--dry-run", action="store_true", help="only report what would change")
+    sync.set_defaults(func=sync_catalog)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+from backend.analytics import rebuild_rows
+
+BRANDS = {1: "Asus", 2: "Asus", 3: "MSI", 4: None}
+
+
+def make_orders(count):
+    rng = random.Random(7)
+    orders = []
+    for order_id in range(1, count + 1):
+        items = []
+        for product_id in rng.sample(sorted(BRANDS) + [5], rng.randint(1, 3)):
+            quantity = rng.randint(1, 4)
+            price = round(rng.uniform(5, 900), 2)
+            item = {"product_id": product_id, "title": f"Product {product_id}", "quantity": quantity, "price": price}
+            if rng.random() < 0.7:
+                item["subtotal"] = round(price * quantity * 0.9, 2)
+            items.append(item)
+        orders.append({"order_id": order_id, "date": f"2025-03-{rng.randint(1, 5):02d}T10:00:00", "items": items})
+    return orders
+
+
+def by_key(rows):
+    return {row["key"]: row for row in rows}
+
+
+def test_numpy_and_python_rebuilds_give_the_same_rollups():
+    pytest.importorskip("numpy")
+    orders = make_orders(300)
+
+    vectorized = by_key(rebuild_rows(orders, BRANDS, vectorized=True))
+    plain = by_key(rebuild_rows(orders, BRANDS, vectorized=False))
+
+    assert vectorized == plain
+
+
+def test_an_order_counts_once_per_rollup_row():
+    orders = [{"order_id": 1, "date": "2025-03-01", "items": [
+        {"product_id": 1, "title": "A", "quantity": 2, "price": 10, "subtotal": 20},
+        {"product_id": 2, "title": "B", "quantity": 1, "price": 5, "subtotal": 5},
+    ]}]
+
+    rows = by_key(rebuild_rows(orders, BRANDS, vectorized=False))
+
+    assert rows["2025-03-01|brand|Asus"]["orders"] == 1
+    assert rows["2025-03-01|brand|Asus"]["units"] == 3
+    assert rows["2025-03-01|day|2025-03-01"]["revenue"] == 25
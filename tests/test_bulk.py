@@ -0,0 +1,66 @@
+import json
+
+from backend.bulk import BulkImport
+from backend.store import invalidate_all
+from backend.utils import products_store
+
+
+def use_data(tmp_path, monkeypatch, products):
+    data_dir = tmp_path / "backend" / "data"
+    data_dir.mkdir(parents=True)
+    (data_dir / "products.json").write_text(json.dumps(products))
+    monkeypatch.chdir(tmp_path)
+    invalidate_all()
+
+
+def lines(*records):
+    return [json.dumps(record) if isinstance(record, dict) else record for record in records]
+
+
+def test_bad_lines_are_reported_by_number_and_the_rest_still_apply(tmp_path, monkeypatch):
+    use_data(tmp_path, monkeypatch, [{"id": 1, "title": "Lamp", "price": 20}])
+
+    report = BulkImport().feed(lines(
+        {"id": 1, "price": 25},
+        "{not json",
+        {"id": 2, "price": -3},
+        "",
+        {"op": "delete", "id": 9},
+        {"title": "Desk", "description": "Oak", "price": 120, "brand": "Ikea"},
+    )).report()
+
+    assert report["errors"] == [
+        {"line": 2, "error": "invalid JSON"},
+        {"line": 3, "error": "price must be a non-negative number"},
+        {"line": 5, "error": "Product not found"},
+    ]
+    assert (report["lines"], report["updated"], report["created"], report["failed"]) == (5, 1, 1, 3)
+    assert products_store.get(1)["price"] == 25
+    assert [p["title"] for p in products_store.load()] == ["Lamp", "Desk"]
+
+
+def test_products_are_written_in_batches(tmp_path, monkeypatch):
+    use_data(tmp_path, monkeypatch, [])
+    writes = []
+    put_many = products_store.put_many
+    monkeypatch.setattr(products_store, "put_many", lambda rows: writes.append(len(rows)) or put_many(rows))
+
+    report = BulkImport(batch_size=2).feed(lines(*(
+        {"id": n, "title": f"Lamp {n}", "description": "d", "price": n, "brand": "Acme"} for n in range(1, 6)
+    ))).report()
+
+    assert report["batches"] == 3
+    assert writes == [2, 2, 1]
+    assert len(products_store.load()) == 5
+
+
+def test_several_lines_for_one_product_apply_in_order(tmp_path, monkeypatch):
+    use_data(tmp_path, monkeypatch, [{"id": 1, "title": "Lamp", "price": 20}])
+
+    BulkImport().feed(lines(
+        {"id": 1, "price": 30},
+        {"op": "delete", "id": 1},
+        {"id": 1, "title": "Lamp", "description": "d", "price": 40, "brand": "Acme"},
+    ))
+
+    assert products_store.get(1)["price"] == 40
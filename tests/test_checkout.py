@@ -0,0 +1,60 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backend.checkout import CheckoutError, place_order
+from backend.store import invalidate_all
+from backend.utils import carts_store, orders_store, products_store
+
+STOCK = 5
+BUYERS = 12
+
+
+def use_data(tmp_path, monkeypatch, products):
+    data_dir = tmp_path / "backend" / "data"
+    data_dir.mkdir(parents=True)
+    (data_dir / "products.json").write_text(json.dumps(products))
+    monkeypatch.chdir(tmp_path)
+    invalidate_all()
+
+
+def test_concurrent_checkouts_never_oversell(tmp_path, monkeypatch):
+    use_data(tmp_path, monkeypatch, [{"id": 1, "title": "Lamp", "price": 20, "stock": STOCK}])
+    buyers = [f"user{n}" for n in range(BUYERS)]
+    carts_store.put_many([{"username": u, "cart": [{"product_id": 1, "quantity": 1}]} for u in buyers])
+
+    def checkout(username):
+        try:
+            return place_order(username)
+        except CheckoutError as e:
+            assert e.status == 400
+            return None
+
+    with ThreadPoolExecutor(max_workers=BUYERS) as pool:
+        orders = [order for order in pool.map(checkout, buyers) if order is not None]
+
+    invalidate_all()
+    assert len(orders) == STOCK
+    assert products_store.get(1)["stock"] == 0
+    assert products_store.get(1)["sold"] == STOCK
+    assert len(orders_store.load()) == STOCK
+
+
+def test_a_failed_checkout_puts_everything_back(tmp_path, monkeypatch):
+    use_data(tmp_path, monkeypatch, [{"id": 1, "title": "Lamp", "price": 20, "stock": STOCK}])
+    cart = {"username": "al", "cart": [{"product_id": 1, "quantity": 2}]}
+    carts_store.put(cart)
+
+    def fail(order, products):
+        raise RuntimeError("rollups unavailable")
+
+    monkeypatch.setattr("backend.checkout.record_order", fail)
+    with pytest.raises(RuntimeError):
+        place_order("al")
+
+    invalidate_all()
+    assert products_store.get(1)["stock"] == STOCK
+    assert "sold" not in products_store.get(1)
+    assert orders_store.load() == []
+    assert carts_store.get("al") == cart
@@ -0,0 +1,44 @@
+from backend.facets import FacetIndex
+from backend.store import Dataset
+
+PRODUCTS = [
+    {"id": 1, "brand": "Asus", "price": 450, "rating": 4.5, "stock": 3, "availabilityStatus": "In Stock"},
+    {"id": 2, "brand": "Asus", "price": 1200, "rating": 3.2, "stock": 0, "availabilityStatus": "Out of Stock"},
+    {"id": 3, "brand": "MSI", "price": 990, "rating": 4.1, "stock": 7, "availabilityStatus": "In Stock"},
+    {"id": 4, "brand": "HP", "price": 2500, "rating": 2.5, "stock": 1, "availabilityStatus": "Low Stock"},
+]
+
+
+def facets_over(tmp_path):
+    dataset = Dataset(str(tmp_path / "products.json"), key="id")
+    dataset.put_many(PRODUCTS)
+    return FacetIndex(dataset)
+
+
+def test_filters_intersect(tmp_path):
+    index = facets_over(tmp_path)
+
+    assert index.filter(brands=["asus", "MSI"], in_stock=True) == {1, 3}
+    assert index.filter(min_price=450, max_price=1200, min_rating=4) == {1, 3}
+    assert index.filter() is None
+
+
+def test_counts_under_a_filter_cover_only_the_matching_products(tmp_path):
+    index = facets_over(tmp_path)
+
+    counts = index.counts(index.filter(in_stock=True))
+
+    assert counts["brand"] == {"Asus": 1, "MSI": 1, "HP": 1}
+    assert counts["price"] == {"0-500": 1, "500-1000": 1, "2000-3000": 1}
+    assert counts["rating"] == {"4+": 2, "3+": 2, "2+": 3, "1+": 3}
+    assert counts["availabilityStatus"] == {"In Stock": 2, "Low Stock": 1}
+    assert counts["in_stock"] == 3
+
+
+def test_counts_follow_a_price_change(tmp_path):
+    index = facets_over(tmp_path)
+
+    index.dataset.put(dict(PRODUCTS[0], price=600))
+
+    assert index.counts({1, 3})["price"] == {"500-1000": 2}
+    assert index.filter(max_price=500) == set()
@@ -0,0 +1,27 @@
+import json
+
+from backend import app
+from backend.store import invalidate_all
+
+
+def test_gzip_revalidation_repeats_the_gzip_etag(tmp_path, monkeypatch):
+    data_dir = tmp_path / "backend" / "data"
+    data_dir.mkdir(parents=True)
+    products = [
+        {"id": i, "title": f"Laptop {i}", "description": "x" * 200, "price": 100 + i, "brand": "Asus", "stock": 5}
+        for i in range(1, 30)
+    ]
+    (data_dir / "products.json").write_text(json.dumps(products))
+    monkeypatch.chdir(tmp_path)
+    invalidate_all()
+    client = app.test_client()
+
+    first = client.get("/products", headers={"Accept-Encoding": "gzip"})
+    assert first.headers["Content-Encoding"] == "gzip"
+    etag = first.headers["ETag"]
+    assert etag.endswith('-gzip"')
+
+    again = client.get("/products", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["ETag"] == etag
+    assert "Accept-Encoding" in again.headers["Vary"]
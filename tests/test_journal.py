@@ -0,0 +1,22 @@
+from backend.journal import JournaledDataset
+
+
+def reopen(path):
+    return JournaledDataset(path, key="id", compact_every=1000)
+
+
+def test_appends_after_a_torn_record_survive_a_restart(tmp_path):
+    path = str(tmp_path / "rows.json")
+    dataset = reopen(path)
+    dataset.put({"id": 1, "value": "a"})
+    # A crash in the middle of an append leaves half a record behind.
+    with open(dataset.journal_path, "ab") as f:
+        f.write(b'{"op":"put","row":{"id":9,"val')
+
+    dataset = reopen(path)
+    assert dataset.get(9) is None
+    dataset.put({"id": 2, "value": "b"})
+    dataset.put({"id": 3, "value": "c"})
+
+    dataset = reopen(path)
+    assert [row["id"] for row in dataset.load()] == [1, 2, 3]
@@ -0,0 +1,48 @@
+from backend.search import SearchIndex
+from backend.store import Dataset
+
+
+def search_over(tmp_path, products):
+    dataset = Dataset(str(tmp_path / "products.json"), key="id")
+    dataset.put_many(products)
+    return SearchIndex(dataset)
+
+
+def test_a_title_hit_ranks_above_a_description_hit(tmp_path):
+    index = search_over(tmp_path, [
+        {"id": 1, "title": "Office chair", "description": "Fits under any desk"},
+        {"id": 2, "title": "Standing desk", "description": "Adjustable height"},
+        {"id": 3, "title": "Lamp", "description": "Warm light"},
+    ])
+
+    assert index.search("desk") == [2, 1]
+
+
+def test_every_word_of_the_query_must_match(tmp_path):
+    index = search_over(tmp_path, [
+        {"id": 1, "title": "Asus Vivobook 15", "brand": "Asus"},
+        {"id": 2, "title": "Asus Zenbook 14", "brand": "Asus"},
+        {"id": 3, "title": "Lenovo IdeaPad 15", "brand": "Lenovo"},
+    ])
+
+    assert index.search("asus 15") == [1]
+
+
+def test_a_prefix_matches_longer_terms_below_an_exact_match(tmp_path):
+    index = search_over(tmp_path, [
+        {"id": 1, "title": "Vivobook Pro"},
+        {"id": 2, "title": "Viv stand"},
+        {"id": 3, "title": "Zenbook"},
+    ])
+
+    assert index.search("viv") == [2, 1]
+
+
+def test_a_put_updates_the_index_without_a_rebuild(tmp_path):
+    index = search_over(tmp_path, [{"id": 1, "title": "Office chair"}])
+    assert index.search("lamp") == []
+
+    index.dataset.put({"id": 1, "title": "Desk lamp"})
+
+    assert index.search("lamp") == [1]
+    assert index.search("chair") == []
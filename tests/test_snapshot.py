@@ -0,0 +1,76 @@
+import json
+import os
+
+from backend.snapshot import LazyRows, SnapshotDataset
+
+ROWS = 40
+
+
+def write_rows(path):
+    with open(path, "w") as f:
+        json.dump([{"id": i, "owner": f"user{i % 4}"} for i in range(1, ROWS + 1)], f)
+
+
+def test_a_listing_leaves_only_the_page_decoded(tmp_path):
+    path = str(tmp_path / "rows.json")
+    write_rows(path)
+    SnapshotDataset(path, key="id").load()  # parses the JSON and writes the snapshot
+
+    dataset = SnapshotDataset(path, key="id")
+    assert len(list(dataset.load())) == ROWS
+    rows, total = dataset.page(10, 5)
+
+    assert [row["id"] for row in rows] == [11, 12, 13, 14, 15] and total == ROWS
+    assert dataset.load().decoded() == 5
+
+
+def test_select_decodes_only_the_group(tmp_path):
+    path = str(tmp_path / "rows.json")
+    write_rows(path)
+    SnapshotDataset(path, key="id", groups=["owner"]).load()
+
+    dataset = SnapshotDataset(path, key="id", groups=["owner"])
+    rows = dataset.select("owner", "user2")
+
+    assert [row["id"] for row in rows] == list(range(2, ROWS + 1, 4))
+    assert dataset.load().decoded() == ROWS // 4
+
+
+def test_a_reopened_dataset_reads_the_rows_back_from_the_snapshot(tmp_path):
+    path = str(tmp_path / "rows.json")
+    write_rows(path)
+    expected = SnapshotDataset(path, key="id").load()
+
+    dataset = SnapshotDataset(path, key="id")
+
+    assert isinstance(dataset.load(), LazyRows)
+    assert list(dataset.load()) == list(expected)
+    assert dataset.get(7) == {"id": 7, "owner": "user3"}
+    assert dataset.get(ROWS + 1) is None and dataset.next_key() == ROWS + 1
+
+
+def test_a_snapshot_older_than_the_json_is_not_used(tmp_path):
+    path = str(tmp_path / "rows.json")
+    write_rows(path)
+    SnapshotDataset(path, key="id").load()
+    with open(path, "w") as f:
+        json.dump([{"id": 1, "owner": "someone else"}], f)
+
+    dataset = SnapshotDataset(path, key="id")
+
+    assert dataset.load() == [{"id": 1, "owner": "someone else"}]
+    # ...and the rebuilt snapshot is the one the next start reads.
+    assert list(SnapshotDataset(path, key="id").load()) == [{"id": 1, "owner": "someone else"}]
+
+
+def test_rows_without_integer_keys_get_no_snapshot(tmp_path):
+    path = str(tmp_path / "rows.json")
+    write_rows(path)
+    SnapshotDataset(path, key="id").load()
+    with open(path, "w") as f:
+        json.dump([{"id": "a1", "owner": "user1"}], f)
+
+    dataset = SnapshotDataset(path, key="id")
+
+    assert dataset.get("a1") == {"id": "a1", "owner": "user1"}
+    assert not os.path.exists(path + ".snap")
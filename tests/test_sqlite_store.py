@@ -0,0 +1,81 @@
+import sqlite3
+
+import pytest
+
+from backend.sqlite_store import SqliteDatabase, SqliteDataset, PRODUCTS_TABLE
+
+
+def open_products(tmp_path):
+    db = SqliteDatabase(str(tmp_path / "shop.db"), [PRODUCTS_TABLE])
+    return db, SqliteDataset(db, PRODUCTS_TABLE)
+
+
+def test_listeners_hear_of_a_write_only_after_commit(tmp_path):
+    db, products = open_products(tmp_path)
+    events = []
+    products.subscribe(lambda event, rows: events.append((event, rows and [r["id"] for r in rows])))
+
+    with db.transaction():
+        products.put({"id": 1, "title": "Lamp"})
+        assert events == []
+    assert events == [("put", [1])]
+
+
+def test_listeners_hear_nothing_of_a_rolled_back_write(tmp_path):
+    db, products = open_products(tmp_path)
+    events = []
+    products.subscribe(lambda event, rows: events.append(event))
+
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            products.put({"id": 1, "title": "Lamp"})
+            raise RuntimeError("checkout failed")
+
+    assert events == []
+    assert products.get(1) is None
+
+
+def test_numbers_read_back_as_the_type_they_were_written_with(tmp_path):
+    _, products = open_products(tmp_path)
+    products.put({"id": 1, "price": 10, "weight": 2.0, "dimensions": {"width": 3, "height": 4.5, "depth": 1}})
+
+    product = products.get(1)
+    assert product["price"] == 10 and type(product["price"]) is int
+    assert type(product["weight"]) is float
+    assert product["dimensions"] == {"width": 3, "height": 4.5, "depth": 1}
+    assert type(product["dimensions"]["width"]) is int
+
+
+def test_real_columns_of_an_older_schema_are_retyped(tmp_path):
+    path = str(tmp_path / "shop.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE products (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT, price REAL, extra TEXT)")
+    conn.execute("INSERT INTO products (id, title, price) VALUES (7, 'Lamp', 12.5)")
+    conn.execute("DELETE FROM products WHERE id = 7")
+    conn.execute("INSERT INTO products (id, title, price) VALUES (3, 'Desk', 80.25)")
+    conn.commit()
+    conn.close()
+
+    products = SqliteDataset(SqliteDatabase(path, [PRODUCTS_TABLE]), PRODUCTS_TABLE)
+    assert products.get(3)["price"] == 80.25
+    products.put({"id": 4, "title": "Chair", "price": 40})
+    assert type(products.get(4)["price"]) is int
+    # Deleted keys are still not handed out again.
+    assert products.next_key() == 8
+
+
+def test_page_orders_like_the_json_dataset_and_counts_every_row(tmp_path):
+    _, products = open_products(tmp_path)
+    products.put_many([
+        {"id": 1, "title": "Lamp", "price": 30},
+        {"id": 2, "title": "Desk"},
+        {"id": 3, "title": "Chair", "price": 30},
+        {"id": 4, "title": "Shelf", "price": 55.5},
+    ])
+
+    rows, total = products.page(1, 2, "price", True, 0)
+    assert total == 4
+    # Ties keep key order; a row without a price sorts as 0.
+    assert [row["id"] for row in rows] == [1, 3]
+    rows, _ = products.page(3, 10, "price", True, 0)
+    assert [row["id"] for row in rows] == [2]
@@ -0,0 +1,49 @@
+import json
+import time
+
+from backend.store import Dataset
+from backend.write_behind import WriteBehind, sync_writes
+
+INTERVAL = 0.2
+
+
+def on_disk(path):
+    with open(path) as f:
+        return {row["id"]: row for row in json.load(f)}
+
+
+def wait_for(check, timeout):
+    deadline = time.monotonic() + timeout
+    while not check():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+def test_every_change_is_written_within_the_interval(tmp_path):
+    path = str(tmp_path / "rows.json")
+    flusher = WriteBehind(INTERVAL, max_pending=1000)
+    dataset = Dataset(path, key="id", write_behind=flusher)
+    try:
+        dataset.put({"id": 1, "value": "a"})
+        assert wait_for(lambda: 1 in on_disk(path), INTERVAL * 5)
+        # A change made after the flusher went idle must get its own deadline.
+        dataset.put({"id": 2, "value": "b"})
+        assert wait_for(lambda: 2 in on_disk(path), INTERVAL * 5)
+    finally:
+        flusher.close()
+
+
+def test_sync_writes_and_close(tmp_path):
+    path = str(tmp_path / "rows.json")
+    flusher = WriteBehind(60, max_pending=1000)
+    dataset = Dataset(path, key="id", write_behind=flusher)
+    dataset.put({"id": 1})
+    with sync_writes():
+        dataset.put({"id": 2})
+    assert set(on_disk(path)) == {1, 2}
+    dataset.put({"id": 3})
+    assert 3 not in on_disk(path)
+    flusher.close()
+    assert set(on_disk(path)) == {1, 2, 3}